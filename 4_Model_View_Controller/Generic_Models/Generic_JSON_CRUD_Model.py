@@ -2,51 +2,13 @@
     Create a Generic CRUD Model for Json File
 """
 import json
-from datetime import datetime   # used in Encoder
 
 if __name__ == "__main__":  # To test the sample at the end of the file
     from Generic_CRUD_Model import Generic_CRUD_Model
+    from Json_Object_Meta import Json_Object_Meta
 else:   # if used as module
     from .Generic_CRUD_Model import Generic_CRUD_Model
-
-class Json_Object_Meta(type):
-    """" Metaclass responsible for adding the Encoder and Decoder methods to the class that uses it """
-
-    def __new__(cls, name, bases, attrs):
-        # Get the name of the class which called the metaclass
-        object_type = super().__new__(cls, name, bases, attrs)
-
-        # Define a generic JSON Encoder to convert an 'object_type' object into a Json dictionary
-        class Encoder(json.JSONEncoder):
-            def default(self, object_item):
-                return self._object_type_encoder(object_item)
-
-            def _object_type_encoder(self, object_item):
-                if isinstance(object_item, object_type):
-                    # Convert the values from 'object_type' to a JSON compatible type
-                    compatible_object_item = {}
-                    for (key, value) in object_item.__dict__.items():
-                        if isinstance(value, datetime):     # JSONEncoder does not support datetime by default
-                            value = value.strftime("%Y-%m-%d %H:%M:%S.%f")
-                        compatible_object_item.update({key:value})
-                    json_dict = compatible_object_item
-                    return json_dict
-                else:
-                    return super().default(object_item)
-
-        # Define a generic JSON Decoder to convert a Json dictionary into an 'object_type' object
-        class Decoder(json.JSONDecoder):
-            def __init__(self):
-                super().__init__(object_hook=self._object_type_decoder)
-
-            def _object_type_decoder(self, json_dict):
-                object_item = object_type(**json_dict)
-                return object_item
-
-        object_type.Encoder = Encoder
-        object_type.Decoder = Decoder
-
-        return object_type
+    from .Json_Object_Meta import Json_Object_Meta   # also imported from here by the existing object types
 
 
 class Generic_JSON_CRUD_Model(Generic_CRUD_Model):
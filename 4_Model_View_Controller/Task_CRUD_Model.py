@@ -1,10 +1,17 @@
+import importlib
+import os
 from datetime import datetime
 
-from Generic_Models.Generic_CRUD_Model import Generic_CRUD_Model
-from Generic_Models.Generic_CSV_CRUD_Model import Generic_CSV_CRUD_Model
-from Generic_Models.Generic_JSON_CRUD_Model import Generic_JSON_CRUD_Model, Json_Object_Meta
-from Generic_Models.Generic_XML_CRUD_Model import Generic_XML_CRUD_Model
-from Generic_Models.Generic_SQLITE3_CRUD_Model import Generic_SQLITE3_CRUD_Model
+from Generic_Models.Json_Object_Meta import Json_Object_Meta
+
+# Generic_CRUD_Model inherited by Task_CRUD_Model : Generic_CRUD_Model, Generic_CSV_CRUD_Model,
+# Generic_JSON_CRUD_Model, Generic_XML_CRUD_Model or Generic_SQLITE3_CRUD_Model (environment variable TASK_BACKEND)
+TASK_BACKEND = os.environ.get("TASK_BACKEND", "Generic_SQLITE3_CRUD_Model")
+
+
+def import_backend(backend_name: str = TASK_BACKEND) -> type:
+    """ Imports only the module of this backend, to keep the startup short """
+    return getattr(importlib.import_module(f"Generic_Models.{backend_name}"), backend_name)
 
 
 class Task(metaclass=Json_Object_Meta):     # needed for Generic_JSON_CRUD_Model
@@ -26,9 +33,9 @@ class Task(metaclass=Json_Object_Meta):     # needed for Generic_JSON_CRUD_Model
         return f"{self.read_format()}"
 
 
-class Task_CRUD_Model(Generic_SQLITE3_CRUD_Model):
+class Task_CRUD_Model(import_backend()):
     """
-    Create a complete CRUD Model for storing 'Task' Object in :
+    Create a complete CRUD Model for storing 'Task' Object in (depending on TASK_BACKEND) :
     - a CSV File named 'Task.csv' if it inherits from 'Generic_CSV_CRUD_Model'
     - a JSON File named 'Task.json' if it inherits from 'Generic_JSON_CRUD_Model'
     - an XML File named 'Task.xml' if it inherits from 'Generic_XML_CRUD_Model'
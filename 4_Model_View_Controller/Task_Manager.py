@@ -1,4 +1,9 @@
 # Task_Manager.py
+# Usage : python Task_Manager.py [--startup-profile]
+import sys
+import time
+start_time = time.perf_counter()
+
 import tkinter as tk
 
 from Task_CRUD_Model import Task_CRUD_Model
@@ -7,9 +12,28 @@ from Task_Views import Two_Rows_View
 from Task_Views import Bar_Chart_View
 from Task_Views import Button_List_View
 
+import_time = time.perf_counter()
+
+HEAVY_MODULES = ("matplotlib", "PIL", "watchdog", "sqlite3", "csv", "xml.etree.ElementTree", "json")
+
+
+def print_startup_profile(timings):
+    """ Prints the durations between the steps of the startup and the heavy modules already loaded """
+    print("Startup profile :")
+    previous_time = start_time
+    for step, step_time in timings:
+        print(f"  {step:<12} {(step_time - previous_time) * 1000:8.1f} ms")
+        previous_time = step_time
+    print(f"  {'total':<12} {(previous_time - start_time) * 1000:8.1f} ms")
+    print("  loaded      ", ", ".join(module for module in HEAVY_MODULES if module in sys.modules))
+    print("  not loaded  ", ", ".join(module for module in HEAVY_MODULES if module not in sys.modules))
+    print("  (run 'python -X importtime Task_Manager.py' for the details of each import)")
+
 
 if __name__ == "__main__":
 
+    startup_profile = "--startup-profile" in sys.argv
+
     two_rows_view = None
     bar_chart_view = None
     button_list_view = None
@@ -32,6 +56,7 @@ if __name__ == "__main__":
             two_columns_view.notify(*args, **kwargs)
 
     task_model = Task_CRUD_Model(file_modified)  # Create a connection to the Model
+    model_time = time.perf_counter()
 
     # Fill the list for demonstration purpose
     fill_the_list = False
@@ -49,5 +74,18 @@ if __name__ == "__main__":
     two_columns_view.grid(column=1, row=0, sticky=tk.NSEW)
     bar_chart_view.grid(column=2, row=0, sticky=tk.NSEW)
     two_rows_view.grid(column=0, columnspan=3, row=1, sticky=tk.NSEW)
+    views_time = time.perf_counter()
+
+    if startup_profile:
+        def on_first_paint():
+            # Finishes the geometry and redraw tasks of the views mapped by the event loop
+            window.update_idletasks()
+            print_startup_profile([
+                ("imports", import_time),
+                ("model", model_time),
+                ("views", views_time),
+                ("first paint", time.perf_counter()),
+            ])
+        window.after_idle(on_first_paint)
 
     window.mainloop()
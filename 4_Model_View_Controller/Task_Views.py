@@ -3,15 +3,25 @@ import io
 
 import tkinter as tk
 from tkinter import ttk
-from PIL import Image, ImageTk
-
-import matplotlib
-# Avoid UserWarning: Starting a Matplotlib GUI outside the main thread will likely fail.
-matplotlib.use('agg')
-from matplotlib import pyplot as plt
 
 from Task_Controllers import Task_Controller
 
+# PIL and matplotlib are only imported when the first chart is drawn (they take most of the startup time otherwise)
+plt = None
+Image = None
+ImageTk = None
+
+
+def import_chart_modules():
+    global plt, Image, ImageTk
+    if plt is None:
+        from PIL import Image, ImageTk
+
+        import matplotlib
+        # Avoid UserWarning: Starting a Matplotlib GUI outside the main thread will likely fail.
+        matplotlib.use('agg')
+        from matplotlib import pyplot as plt
+
 
 class Button_List_View(tk.LabelFrame):
 
@@ -575,15 +585,20 @@ class Bar_Chart_View(tk.LabelFrame):
         self.image_label.pack_forget()  # Allow to the image to be resized properly
         if len(self.tasks) == 0:
             self.set_text_label()
+        elif not self.winfo_ismapped():
+            # Not displayed yet : the chart will be drawn at its real size by the first <Configure> event
+            self.set_text_label("Loading the chart...")
         else:
             self.set_image_label(600, 400)
         self.image_label.pack(fill=tk.BOTH, expand=True)
 
-    def set_text_label(self):
-        self.image_label.config(text="No task to display", image="", padx=20)
+    def set_text_label(self, text="No task to display"):
+        self.image_label.config(text=text, image="", padx=20)
         self.image_label.image = None
 
     def set_image_label(self, width, height):
+        import_chart_modules()
+
         # Update the content of the new graph
         image_data = self.design_chart(width, height)
 
@@ -1,16 +1,18 @@
 import os
 import sys
+from typing import Union
 
 # Update sys.path to include the parent directory
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 #if __name__ == "__main__" :
-from Observer_patterns.Observables import ObservableList
+from Observer_patterns.Observables import ObservableList, CompactObservableList
 
 
 class Bound_List(list):
     """ Sets a ttk.Treeview bound to a list of class properties (one way only) """
 
-    def __init__(self, name, observable_list: ObservableList, on_size_modified=None, on_item_modified=None):
+    def __init__(self, name, observable_list: Union[ObservableList, CompactObservableList],
+                 on_size_modified=None, on_item_modified=None):
         super().__init__()
         self.name = name
         self.on_list_size_modified = on_size_modified
@@ -18,9 +20,20 @@ class Bound_List(list):
 
         # calls _update_tk_list on list modification
         self._property_list = observable_list.bind_list(self._update_list)
+        # a CompactObservableList notifies all its item modifications to a single bound function
+        self._is_compact = isinstance(observable_list, CompactObservableList)
+        if self._is_compact:
+            observable_list.bind_items(self._update_item)
         self._update_list(False)
 
     def _update_list(self, initialized=True):
+        if self._is_compact:
+            super().clear()
+            super().extend(self._property_list)
+            if initialized and self.on_list_size_modified is not None:
+                self.on_list_size_modified()
+            return
+
         for _property in self._property_list:
             _property.unbind_property()  # ObservableProperty unbind
         super().clear()
@@ -35,21 +48,30 @@ class Bound_List(list):
 
     def _update_item(self, key):
         if 0 <= key < len(self):
-            super().__setitem__(key, self._property_list[key].get() )
+            if self._is_compact:
+                super().__setitem__(key, self._property_list[key])
+            else:
+                super().__setitem__(key, self._property_list[key].get())
 
         if self.on_list_item_modified is not None:
             self.on_list_item_modified(key)
 
     def __setitem__(self, key, value):
-        self._property_list[key].set(value)
+        if self._is_compact:
+            self._property_list.set(key, value)
+        else:
+            self._property_list[key].set(value)
 
     def update(self, value):
         self._property_list.update(value)
 
     def unbind_list(self):
         """ should be used on_closing window """
-        for _property in self._property_list:
-            _property.unbind_property()  # ObservableProperty unbind
+        if self._is_compact:
+            self._property_list.unbind_items()  # CompactObservableList items unbind
+        else:
+            for _property in self._property_list:
+                _property.unbind_property()  # ObservableProperty unbind
         self._property_list.unbind_list()  # ObservableList unbind
 
 
@@ -135,3 +157,18 @@ if __name__ == "__main__":
     observed_list.update(['Revised','and','more'])
     print(f"{observed_list = }")
     print(f"{bound_list = }")
+
+    print("\ncompact_list = CompactObservableList(['One','Two','Three'])")
+    compact_list = CompactObservableList(['One', 'Two', 'Three'])
+    bound_compact_list = Bound_List("bound_compact_list", compact_list, on_list_size_modified, on_list_item_modified)
+    print(f"{bound_compact_list = }")
+
+    print("\ncompact_list.set(1, 'Changed')")
+    compact_list.set(1, 'Changed')
+    print(f"{compact_list = }")
+    print(f"{bound_compact_list = }")
+
+    print("\nbound_compact_list.update(['One','Changed','Three','Four'])")
+    bound_compact_list.update(['One', 'Changed', 'Three', 'Four'])
+    print(f"{compact_list = }")
+    print(f"{bound_compact_list = }")
@@ -2,10 +2,11 @@ import os
 import sys
 import tkinter as tk
 from tkinter import ttk
+from typing import Union
 
 # Update sys.path to include the parent directory
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-from Observer_patterns.Observables import ObservableProperty, ObservableList
+from Observer_patterns.Observables import ObservableProperty, ObservableList, CompactObservableList
 
 
 class BoundTk_Variable(tk.Variable):
@@ -51,18 +52,40 @@ class BoundTk_ListVar(list):
         self.master = master
         self.on_list_size_modification = on_list_modif
 
+        # ('insert' or 'delete', index) applied by the last list modification, None if the whole list was rebuilt
+        self.changes = None
+        self._created_count = 0
+
         # calls _update_tk_list on list modification
         self._property_list = observable_list.bind_list(self._update_tk_list)
         for i, _property in enumerate(self._property_list) :
-            self.append( self.list_type(f"{self.name}_{i}",_property, self.master) )
+            self.append(self._new_tk_variable(_property))
+
+    def _new_tk_variable(self, _property):
+        # unique names, as the variables are not renamed when the previous ones are inserted or deleted
+        self._created_count += 1
+        return self.list_type(f"{self.name}_{self._created_count}", _property, self.master)
 
     def _update_tk_list(self):
-        print(f"\n{self.name} _update_tk_list : property_list size changed")
-        for _tk_variable in self:
-            _tk_variable.unbind_tk_var()   # ObservableProperty unbind
-        self.clear()
-        for i, _property in enumerate(self._property_list) :
-            self.append( self.list_type(f"{self.name}_{i}",_property, self.master) )
+        changes = getattr(self._property_list, "changes", None)
+        size_change = sum(1 if operation == 'insert' else -1 for operation, index in changes or [])
+        if changes and len(self) + size_change == len(self._property_list):
+            # Only creates/unbinds the variables of the inserted/deleted properties
+            for operation, index in changes:
+                if operation == 'delete':
+                    self.pop(index).unbind_tk_var()   # ObservableProperty unbind
+                elif operation == 'insert':
+                    self.insert(index, self._new_tk_variable(self._property_list[index]))
+            self.changes = list(changes)
+        else:
+            # No changes, or changes of another update (checked before modifying the variables) : rebuild the list
+            print(f"\n{self.name} _update_tk_list : property_list size changed")
+            for _tk_variable in self:
+                _tk_variable.unbind_tk_var()   # ObservableProperty unbind
+            self.clear()
+            for i, _property in enumerate(self._property_list) :
+                self.append(self._new_tk_variable(_property))
+            self.changes = None
         if self.on_list_size_modification is not None:
             self.on_list_size_modification()
 
@@ -97,42 +120,204 @@ class BoundTk_IntVar(BoundTk_Variable, tk.IntVar):
             return None
 
 
-class BoundTk_TreeView(ttk.Treeview):
-    """ Sets a ttk.Treeview bound to a list of class properties (one way only) """
+class BoundTk_VirtualTreeView(ttk.Treeview):
+    """
+    Sets a ttk.Treeview bound to a list of class properties (one way only)
+    which only holds the visible rows (plus an overscan) of the list in Tk
+
+    The rows are recycled while scrolling : their values are paged from the bound ObservableList (or
+    CompactObservableList) and the scrollbar set by 'yscrollcommand' follows the position in the whole list.
+    The selection is kept by list index, use 'selected_items' and 'clear_selection' rather than the Tk selection
+    which only knows the materialized rows.
+    """
 
-    def __init__(self, name, observable_list: ObservableList,
-                 master, columns, show, *args, **kwargs):
+    def __init__(self, name, observable_list: Union[ObservableList, CompactObservableList],
+                 master, columns, show, overscan=10, *args, **kwargs):
+        self._yscrollcommand = kwargs.pop("yscrollcommand", None)
         super().__init__(master=master, columns=columns, show=show, *args, **kwargs)
         self.name = name
         self.master = master
         self.columns = columns
-
-        # calls _update_tk_list on list modification
-        self._property_list = observable_list.bind_list(self._update_tk_whole_treeview)
-        self._update_tk_whole_treeview()
-
-    def _update_tk_whole_treeview(self):
-        for i, _property in enumerate(self._property_list) :
-            _property.unbind_property()      # ObservableProperty unbind
-        self.delete(*self.get_children())
-
-        # Insert item from the model
-        for i, _property in enumerate(self._property_list) :
-            _property.bind_property(lambda index=i: self._update_tk_treeview_item(index))
-
-            # insert : 'tags' converts the values to compatible str
-            self.insert( parent="", index=tk.END, values=_property.get(), tags=_property.get())
+        self.overscan = overscan
+
+        self._item_ids = []     # recycled treeview rows, the first one displays the list item at _start
+        self._start = 0         # index in the list of the first materialized row
+        self._first = 0         # index in the list of the first visible row
+        self._visible_rows = int(self.cget("height"))
+        self._bound_properties = []
+        self._selected_indexes = set()  # including the selected items out of the materialized rows
+
+        # calls _update_tk_treeview on list modification
+        self._is_compact = isinstance(observable_list, CompactObservableList)
+        self._property_list = observable_list.bind_list(self._update_tk_treeview)
+        if self._is_compact:
+            # a single function is notified with the index of each modified item
+            observable_list.bind_items(self._update_tk_treeview_item)
+
+        self.bind("<Configure>", self._on_configure, add="+")
+        # The class bindings of the Treeview call the Tcl 'yview' (and 'see') directly, which would only scroll the
+        # materialized rows : the wheel and the navigation keys scroll the whole list here and "break" them
+        self.bind("<MouseWheel>", lambda event: self._scroll_event(-1 if event.delta > 0 else 1, tk.UNITS))
+        self.bind("<Button-4>", lambda event: self._scroll_event(-1, tk.UNITS))     # X11 wheel
+        self.bind("<Button-5>", lambda event: self._scroll_event(1, tk.UNITS))
+        self.bind("<Prior>", lambda event: self._scroll_event(-1, tk.PAGES))
+        self.bind("<Next>", lambda event: self._scroll_event(1, tk.PAGES))
+        self.bind("<Up>", lambda event: self._move_focus(-1))
+        self.bind("<Down>", lambda event: self._move_focus(1))
+        self._render()
+
+    def configure(self, cnf=None, **kwargs):
+        # The scrollbar follows the position in the whole list, not in the materialized rows
+        if "yscrollcommand" in kwargs:
+            self._yscrollcommand = kwargs.pop("yscrollcommand")
+            self._set_scrollbar()
+        return super().configure(cnf, **kwargs)
+
+    config = configure
+
+    def _value(self, index):
+        if self._is_compact:
+            return self._property_list[index]
+        return self._property_list[index].get()
+
+    def _row_height(self):
+        row_height = ttk.Style(self).lookup("Treeview", "rowheight")
+        return int(row_height) if row_height else 20
+
+    def _on_configure(self, event):
+        # the heading takes about one row
+        visible_rows = max(1, event.height // self._row_height() - 1)
+        if visible_rows != self._visible_rows:
+            self._visible_rows = visible_rows
+            self._render()
+
+    def _sync_selection(self):
+        """ Updates the selected indexes of the materialized rows with the Tk selection """
+        materialized = set(range(self._start, self._start + len(self._item_ids)))
+        self._selected_indexes -= materialized
+        self._selected_indexes |= {self.list_index(item_id) for item_id in self.selection()}
+
+    def list_index(self, item_id):
+        """ Index in the bound list of a treeview item """
+        return self._start + self._item_ids.index(item_id)
+
+    def selected_items(self) -> dict:
+        """ dict[list_index] = value of the selected items, visible or not """
+        self._sync_selection()
+        return {index: self._value(index) for index in sorted(self._selected_indexes)}
+
+    def clear_selection(self):
+        self._selected_indexes = set()
+        if self.selection():
+            self.selection_set([])
+
+    def yview(self, *args):
+        """ Called by the scrollbar : 'moveto' fraction or 'scroll' number 'units'/'pages' """
+        if not args:
+            total = max(1, len(self._property_list))
+            return self._first / total, min(1.0, (self._first + self._visible_rows) / total)
+        if args[0] == tk.MOVETO:
+            self._scroll_to(int(float(args[1]) * len(self._property_list)))
+        elif args[0] == tk.SCROLL:
+            self.yview_scroll(int(args[1]), args[2])
+
+    def yview_moveto(self, fraction):
+        self.yview(tk.MOVETO, fraction)
+
+    def yview_scroll(self, number, what):
+        step = self._visible_rows if what == tk.PAGES else 1
+        self._scroll_to(self._first + int(number) * step)
+
+    def _scroll_event(self, number, what):
+        self.yview_scroll(number, what)
+        return "break"
+
+    def _move_focus(self, delta):
+        """ Moves the focus and the selection to the previous/next item of the list, scrolling if needed """
+        total = len(self._property_list)
+        if total == 0:
+            return "break"
+        focus = self.focus()
+        index = self.list_index(focus) + delta if focus in self._item_ids else self._first
+        index = max(0, min(index, total - 1))
+        if index < self._first:
+            self._scroll_to(index)
+        elif index >= self._first + self._visible_rows:
+            self._scroll_to(index - self._visible_rows + 1)
+        item_id = self._item_ids[index - self._start]
+        self._selected_indexes = {index}
+        self.focus(item_id)
+        self.selection_set([item_id])   # generates a <<TreeviewSelect>>
+        return "break"
+
+    def _scroll_to(self, first):
+        first = max(0, min(first, len(self._property_list) - self._visible_rows))
+        if first != self._first:
+            self._first = first
+            self._render()
+
+    def _set_scrollbar(self):
+        if self._yscrollcommand is not None:
+            self._yscrollcommand(*self.yview())
+
+    def _update_tk_treeview(self):
+        # The size of the list changed, only the materialized rows need to be refreshed
+        # and the selected indexes do not match the same items anymore
+        self.clear_selection()
+        self._render()
+
+    def _render(self):
+        self._sync_selection()
+        total = len(self._property_list)
+        self._first = max(0, min(self._first, total - self._visible_rows))
+        self._start = max(0, self._first - self.overscan)
+        stop = min(total, self._first + self._visible_rows + self.overscan)
+
+        # Recycle the existing rows, only creates or deletes the difference
+        rows = stop - self._start
+        while len(self._item_ids) > rows:
+            self.delete(self._item_ids.pop())
+        while len(self._item_ids) < rows:
+            self._item_ids.append(self.insert(parent="", index=tk.END))
+
+        self._unbind_properties()
+        selection = []
+        for row, item_id in enumerate(self._item_ids):
+            index = self._start + row
+            value = self._value(index)
+            # 'tags' converts the values to compatible str
+            self.item(item=item_id, values=value, tags=value)
+            if not self._is_compact:
+                _property = self._property_list[index]
+                _property.bind_property(lambda i=index: self._update_tk_treeview_item(i))
+                self._bound_properties.append(_property)
+            if index in self._selected_indexes:
+                selection.append(item_id)
+        # Move the selection with the recycled rows (generates a <<TreeviewSelect>> only if changed)
+        if set(selection) != set(self.selection()):
+            self.selection_set(selection)
+
+        # Display the first visible row at the top of the treeview
+        if rows > 0:
+            super().yview_moveto((self._first - self._start) / rows)
+        self._set_scrollbar()
 
     def _update_tk_treeview_item(self, index):
-        if 0 <= index < len(self.get_children()):
-            self.item( item=self.get_children()[index],
-                       values=self._property_list[index].get(),
-                       tags=self._property_list[index].get())
+        row = index - self._start
+        if 0 <= row < len(self._item_ids):
+            value = self._value(index)
+            self.item(item=self._item_ids[row], values=value, tags=value)
+
+    def _unbind_properties(self):
+        for _property in self._bound_properties:
+            _property.unbind_property()  # ObservableProperty unbind
+        self._bound_properties = []
 
     def unbind_tk_treeview(self):
         """ should be used on_closing window """
-        for _property in self._property_list:
-            _property.unbind_property()  # ObservableProperty unbind
+        self._unbind_properties()
+        if self._is_compact:
+            self._property_list.unbind_items()  # CompactObservableList items unbind
         self._property_list.unbind_list()
 
 
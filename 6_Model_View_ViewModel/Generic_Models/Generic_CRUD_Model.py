@@ -1,20 +1,30 @@
 """
     Create a Generic CRUD Model
 """
+import atexit
+import hashlib
 import inspect
 import os
+import pickle
 import sys
 import threading
+import weakref
+from collections import deque, namedtuple
+from contextlib import contextmanager
 from datetime import datetime
-from time import sleep
+from time import sleep, monotonic
 from typing import get_type_hints
 
-from watchdog.observers import Observer
+try:
+    import fcntl    # file locks between processes (not available on Windows, where the files are not locked)
+except ImportError:
+    fcntl = None
 
 
 # Update sys.path to include the parent directory
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-from Observer_patterns.FileObserverHandler import FileObserverHandler
+from Observer_patterns.FileObserverHandler import FileObserverHandler, file_observer_registry
+from Observer_patterns.Change_Bus import Change_Bus
 
 # if __name__ == "__main__":
 # else:
@@ -28,6 +38,16 @@ from Observer_patterns.Observables import Observable
 #     from ..Observer_patterns.ObserverObject import Observable
 ###
 
+class Model_Conflict_Error(ValueError):
+    """ Raised when the model has been modified (by another process) since the generation expected by a modification """
+
+
+# Modification returned by changes() : 'values' are the arguments of the 'object_type' (None for a deletion)
+Model_Change = namedtuple("Model_Change", ["version", "operation", "list_idx", "values"])
+# Returned by changes() instead of the modifications no longer in the journal : 'values' are all the objects read
+Model_Reset = namedtuple("Model_Reset", ["version", "values"])
+
+
 class Generic_CRUD_Model(Observable):           ### (Observable) Added to share the Model between Views
     """
     Generic CRUD Model for 'object_type' type objects to/from 'file_type' file
@@ -35,6 +55,21 @@ class Generic_CRUD_Model(Observable):           ### (Observable) Added to share
     The arguments of the __init__ method in the 'object_type' class must match the names of its attributes
     """
 
+    # see set_durability (None keeps the default behaviour of each backend)
+    DURABILITY_LEVELS = (None, "none", "flush", "fsync", "fsync+dir")
+
+    # the file is locked against the other processes during the readings and the read-modify-write sequences
+    FILE_LOCKING = True
+
+    # the modifications are published to the models of the other processes (see _publish_change)
+    CHANGE_BUS = True
+
+    # number of modifications kept by the journal of changes() (see set_journal)
+    JOURNAL_SIZE = 1000
+
+    # the objects read are kept in a '.snapshot' file to start faster (see _get_file_objects_from_snapshot)
+    SNAPSHOT = True
+
     def __init__(self, object_type: type, on_modified: callable = None, file_extension: str = None):
 
         # check if object_type is a class
@@ -55,18 +90,53 @@ class Generic_CRUD_Model(Observable):           ### (Observable) Added to share
 
         # and a list of object_type in memory
         self.object_list: list[object_type] = []
+        # incremented on each modification of the object_list (by this process or by another one)
+        self.generation = 0
+        # incremented on each writing of the file/db, shared by all the processes (see _read_store_generation)
+        self.store_generation = 0
+        # last modifications of the object_list for changes(), with a "reset" when they are unknown (see set_journal)
+        self.journal = deque(maxlen=self.JOURNAL_SIZE)
+        self.journal_persisted = False
+        self.journal_appended = 0
+        self.snapshot_hits = 0  # readings of the file replaced by its snapshot
+        self.snapshot_misses = 0
+        self.snapshot_outdated = False  # the file has been written since the snapshot (see _write_outdated_snapshot)
 
         # The object is defined as an Observable so it can be used by different views in the same program
         # the 'notify' function will be used to notify the registered observers when needed (create/update/delete)
         super().__init__()
 
         self.filename = None
-        self.file_observer = None
-        self.file_observer_handler = None
-
-        ### Added to share the Model between Views
-        self.observer_thread = None
-        ###
+        self._on_file_modified = None
+        self.last_modified_timestamp = None
+        self.file_observer_handler = None   # registered in the file_observer_registry shared by the models
+
+        # Write-behind mode (see set_write_behind) : the file is written at most once per interval
+        self.lock = threading.RLock()   # the modifications and the flush can be done by different threads
+        self.write_behind_interval = None
+        self.dirty_since = None     # time of the first modification not written in the file yet
+        self.flush_timer = None
+        self.write_count = 0    # modifications of the object_list
+        self.flush_count = 0    # writings of the file
+        self.max_staleness = 0.0    # longest time (in seconds) a modification waited to be written
+
+        self.durability = None
+
+        # File lock shared with the other processes (see _file_lock)
+        self.lock_timeout = None    # None waits for the lock, 0 only tries once (see set_lock_timeout)
+        self.file_lock = None   # lock file held by this model
+        self.lock_count = 0
+        self.lock_wait_time = 0.0   # total time (in seconds) waiting for the other processes
+        self.max_lock_wait = 0.0
+
+        # Modifications received from the other processes (see _on_change_event)
+        self.change_bus = None
+        self.change_publisher = None    # only publishing the modifications of a model without watcher
+        self.changes_applied = 0    # applied to the object_list without reading the file
+        self.changes_reloaded = 0   # missing or out of order events : the file has been read again
+
+        # False until the first access to the objects, so a short script does not read the file it does not use
+        self.loaded = False
 
         # If the use of a file is requested
         if file_extension is not None:
@@ -75,35 +145,90 @@ class Generic_CRUD_Model(Observable):           ### (Observable) Added to share
                 raise TypeError(f"'{file_extension}' is not a string.")
             self.filename = f"{self.object_type.__name__}.{file_extension.lower()}"
             self._on_file_modified = on_modified
-            self._init_file_objects()
-
-            # The object is also defined as a File Observer, so the file can be shared by different programs
-            # 'file_modified' whill be called each time it receives a notification
-            file_abspath = os.path.abspath(self.filename)
-            self.file_observer_handler = FileObserverHandler(file_abspath, self._on_file_modified_checking_timestamp)
-            self.file_observer = Observer()
-            self.file_observer.schedule(self.file_observer_handler, path=os.path.dirname(file_abspath), recursive=False)
+            # The file is read at the first access to the objects (see _ensure_loaded)
 
-            ### Added to share the Model between Views
-            # Start the watchdog observer in a separate thread for a better handling in case of closing view
-            self.observer_thread = threading.Thread(target=self.file_observer.start)
-            self.observer_thread.start()
-            ###
+            # The file is observed only while someone needs to be notified of its modifications (see _update_watcher)
+            self._update_watcher()
 
             self.last_modified_timestamp = None  # Will be used to check if the file has been modified from outside
 
 
     def __del__(self) -> None:
-        if self.file_observer:
-            self.file_observer.stop()  # Stop the observer from FileSystemEventHandler
-            self.file_observer.join()  # Wait for the end of the observer thread
-        if self.file_observer_handler:
-            self.file_observer_handler.stop()  # Stop the observer handler
+        if getattr(self, "dirty_since", None) is not None:
+            self.flush()
+        if getattr(self, "snapshot_outdated", False):
+            self._write_outdated_snapshot()
+        if getattr(self, "filename", None):
+            self._stop_watcher()
+
+    def _ensure_loaded(self) -> None:
+        """ Inits the file/db and reads the objects at the first access instead of at the creation of the model """
+        if self.loaded:
+            return
+        with self.lock:
+            if not self.loaded:
+                self.loaded = True  # _init_file_objects may call _get_file_objects_with_last_timestamp
+                try:
+                    self._init_file_objects()
+                except BaseException:
+                    self.loaded = False
+                    raise
+
+    def add_observer(self, observer: callable):
+        super().add_observer(observer)
+        self._update_watcher()
+
+    def remove_observer(self, observer: callable):
+        super().remove_observer(observer)
+        self._update_watcher()
+
+    def _on_observer_dropped(self):
+        self._update_watcher()  # the last observer may have been garbage collected without being removed
+
+    def _update_watcher(self) -> None:
+        """
+        The file is observed while there is an 'on_modified' function or at least one live observer, its
+        modifications are then given to the 'on_modified' function (if any) or to the observers
+        """
+        if not getattr(self, "filename", None):
+            return  # also called by the garbage collector, maybe while the model is created or destroyed
+        if self._on_file_modified is not None or self.count_observers() > 0:
+            self._start_watcher()
+        else:
+            self._stop_watcher()
 
-        ### Added to share the Model between Views
-        if hasattr(self, "observer_thread") and isinstance(self.observer_thread, threading.Thread):
-            self.observer_thread.join()  # Wait for the end of the observer_thread
-        ###
+    def _start_watcher(self) -> None:
+        with self.lock:
+            if self.file_observer_handler is not None:
+                return
+
+            # The object is also defined as a File Observer, so the file can be shared by different programs
+            # 'file_modified' whill be called each time it receives a notification
+            # (a single watchdog Observer and a single watch per directory for all the models of the process)
+            file_abspath = os.path.abspath(self.filename)
+            self.file_observer_handler = FileObserverHandler(file_abspath, self._on_file_modified_checking_timestamp)
+            file_observer_registry.watch(self.file_observer_handler)
+
+            # The other processes publish their modifications on a faster channel than the file system events,
+            # the file observer only notifies the modifications of the programs which do not use it
+            if self.CHANGE_BUS:
+                self.change_bus = Change_Bus(f"{file_abspath}.bus", self._on_change_event)
+
+    def _stop_watcher(self) -> None:
+        with self.lock:
+            if self.change_bus is not None:
+                self.change_bus.stop()
+                self.change_bus = None
+            if self.file_observer_handler is not None:
+                file_observer_registry.unwatch(self.file_observer_handler)  # the Observer stops with the last file
+                self.file_observer_handler = None
+
+    def _notify_file_modified(self, *args, **kwargs) -> None:
+        """ Modification of another process : given to the 'on_modified' function, or to the observers without it """
+        if self._on_file_modified is not None:
+            self._on_file_modified(self, *args, **kwargs)
+        else:
+            self.notify_observers()
 
     def _init_file_objects(self) -> None:
         """ Can be overriden to init the file/db to store the 'object_type' objects """
@@ -111,34 +236,497 @@ class Generic_CRUD_Model(Observable):           ### (Observable) Added to share
 
     def _set_file_objects_with_last_timestamp(self) -> None:
         """ Equivalent to an inherited decorator for the classes which override set_file_objects """
-        self._set_file_objects()
+        with self.lock:
+            self.generation += 1
+            self.write_count += 1
+            if self.write_behind_interval is not None:
+                self.store_generation += 1  # written in the file by the flush
+                self._mark_dirty()
+                return
+            self._set_file_objects()
+            self._write_store_generation(self._read_store_generation() + 1)
+            self._sync_directory()  # the file and the lock file
+            self.flush_count += 1
+            if self.filename:
+                self.last_modified_timestamp = os.path.getmtime(self.filename)
+            self._mark_snapshot_outdated()
+
+    def _read_store_generation(self) -> int:
+        """
+        Can be overriden to read the generation stored with the objects,
+        kept in the lock file of the file models (0 if it has never been written)
+        """
+        if not self.filename or self.dirty_since is not None:
+            return self.store_generation    # no file, or the objects in memory are more recent than the file
+        try:
+            with open(f"{self.filename}.lock", "r") as lock_file:
+                return int(lock_file.read() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def _write_store_generation(self, store_generation: int) -> None:
+        """ Can be overriden to write the generation with the objects (called with the exclusive lock) """
         if self.filename:
-            self.last_modified_timestamp = os.path.getmtime(self.filename)
+            with open(f"{self.filename}.lock", "w") as lock_file:   # the lock is not released by the truncation
+                lock_file.write(str(store_generation))
+                self._sync_file(lock_file)  # as durable as the objects, for the expected_generation checks
+        self.store_generation = store_generation
+
+    def _reload_if_outdated(self) -> None:
+        """ Reloads the objects before a modification only if the file has been modified since they were read """
+        self._ensure_loaded()
+        if self.filename and self.store_generation == self._read_store_generation() \
+                and self.last_modified_timestamp == os.path.getmtime(self.filename):
+            return
+        self._get_file_objects_with_last_timestamp()
+
+    def _check_expected_generation(self, expected_generation: int = None) -> None:
+        if expected_generation is not None:
+            store_generation = self._read_store_generation()
+            if store_generation != expected_generation:
+                raise Model_Conflict_Error(f"{self.filename or self.object_type.__name__} is at the generation "
+                                           f"{store_generation} instead of {expected_generation}")
+
+    def set_durability(self, durability: str = None) -> None:
+        """
+        Trades the throughput of the modifications against their durability in case of crash or power loss :
+        - 'none' : the written data is left in the buffers of the system
+        - 'flush' : the buffers of the application are flushed to the system at each writing
+        - 'fsync' : the file is synchronised on the disk at each writing (os.fsync)
+        - 'fsync+dir' : the directory containing the file is synchronised too (for the creation of the file)
+
+        The CSV, JSON and XML backends close the file after each writing, which flushes it, so 'none' and 'flush'
+        give the same durability for them : they only differ for SQLite (PRAGMA synchronous OFF and NORMAL).
+        """
+        if durability not in self.DURABILITY_LEVELS:
+            raise ValueError(f"durability must be one of {self.DURABILITY_LEVELS}")
+        self.durability = durability
+
+    def _sync_file(self, file) -> None:
+        """ Called by the backends before closing the file they have written (which flushes it anyway) """
+        if self.durability in ("fsync", "fsync+dir"):
+            file.flush()    # before os.fsync, the buffers of the application are not written yet
+            os.fsync(file.fileno())
+
+    def _sync_directory(self) -> None:
+        if self.durability == "fsync+dir" and self.filename and os.name == "posix":
+            directory_fd = os.open(os.path.dirname(os.path.abspath(self.filename)), os.O_RDONLY)
+            try:
+                os.fsync(directory_fd)
+            finally:
+                os.close(directory_fd)
+
+    def set_write_behind(self, interval: float = None) -> None:
+        """
+        Writes the modifications in the file at most once per 'interval' seconds instead of at each modification
+        (None to write them immediately again), so the file is never more than 'interval' seconds behind the memory
+
+        Until the flush, the objects in memory are used instead of the file : a modification of the file by another
+        process in the meantime is overwritten by the flush.
+        """
+        if interval is not None and interval < 0:
+            raise ValueError("interval must be positive")
+        if interval is not None and self.write_behind_interval is None:
+            # Writes the last modifications at exit without keeping the model alive
+            model_ref = weakref.ref(self)
+            atexit.register(lambda: model_ref() is not None and model_ref().flush())
+        self.flush()
+        self.write_behind_interval = interval
+
+    def _mark_dirty(self) -> None:
+        if self.dirty_since is None:
+            self.dirty_since = monotonic()
+            # The flush is not postponed by the next modifications to bound the staleness of the file
+            self.flush_timer = threading.Timer(self.write_behind_interval, self.flush)
+            self.flush_timer.daemon = True
+            self.flush_timer.start()
+
+    def flush(self) -> None:
+        """ Writes the modifications waiting in write-behind mode (if any) """
+        with self._file_lock(exclusive=True):
+            if self.flush_timer is not None:
+                self.flush_timer.cancel()
+                self.flush_timer = None
+            if self.dirty_since is None:
+                return
+            dirty_since, store_generation = self.dirty_since, self.store_generation
+            self.dirty_since = None     # the generation is read from the file again
+            self._set_file_objects()
+            self._write_store_generation(max(store_generation, self._read_store_generation() + 1))
+            self._sync_directory()  # the file and the lock file
+            self.flush_count += 1
+            self.max_staleness = max(self.max_staleness, monotonic() - dirty_since)
+            if self.filename:
+                self.last_modified_timestamp = os.path.getmtime(self.filename)
+            self._mark_snapshot_outdated()
+            self._publish_change("reload")  # several modifications written at once
+
+    def write_behind_stats(self) -> dict:
+        return {"writes": self.write_count,
+                "flushes": self.flush_count,
+                "flushes_saved": self.write_count - self.flush_count,
+                "max_staleness": self.max_staleness,
+                "pending": self.dirty_since is not None}
 
     def _set_file_objects(self) -> None:
         """ Can be overriden to set the object_list of 'object_type' into the file/db """
         ...
 
-    def _get_file_objects_with_last_timestamp(self) -> None:
-        """ Equivalent to an inherited decorator for the classes which override set_file_objects """
-        self._get_file_objects()
-        if self.filename :
-            self.last_modified_timestamp = os.path.getmtime(self.filename)
+    def _get_file_objects_with_last_timestamp(self, from_snapshot: bool = False) -> None:
+        """
+        Equivalent to an inherited decorator for the classes which override set_file_objects
+
+        'from_snapshot' is only given by _init_file_objects : the file is read again when it has been modified
+        by another process, which has written its own snapshot
+        """
+        self._ensure_loaded()
+        if self.dirty_since is not None:
+            return  # write-behind mode : the objects in memory are more recent than the file
+        with self._file_lock(exclusive=False):
+            previous_store_generation = self.store_generation
+            previous_timestamp = self.last_modified_timestamp
+            if from_snapshot:
+                self._get_file_objects_from_snapshot()
+            else:
+                self._get_file_objects()
+            self.store_generation = self._read_store_generation()
+            if self.filename :
+                current_timestamp = os.path.getmtime(self.filename)
+                if current_timestamp != self.last_modified_timestamp:
+                    self.generation += 1    # modified by another process (or by a database request)
+                self.last_modified_timestamp = current_timestamp
+            if self.store_generation != previous_store_generation:
+                # modified by another process : the modifications are unknown
+                self.journal.append(Model_Change(self.store_generation, "reset", None, None))
+            elif self._is_modified_without_generation(previous_timestamp):
+                self._increment_store_generation()
+
+    def _is_modified_without_generation(self, previous_timestamp) -> bool:
+        """
+        Can be overriden : True if the objects just read have been modified by a program which does not increment
+        the store generation (a text editor, a script...), as the file has been modified since it was last read
+        """
+        return previous_timestamp is not None and self.last_modified_timestamp != previous_timestamp
+
+    def _increment_store_generation(self) -> None:
+        """
+        Gives a new store generation to a modification made without it, so changes() returns a Model_Reset instead
+        of ignoring it (unless a model of another process has already done it)
+        """
+        store_generation = self._read_store_generation()
+        if store_generation == self.store_generation:
+            store_generation += 1
+            self._write_store_generation(store_generation)
+        self.store_generation = store_generation
+        self.journal.append(Model_Change(self.store_generation, "reset", None, None))
+
+    def set_lock_timeout(self, timeout: float = None) -> None:
+        """
+        Time to wait (in seconds) for a file locked by another process before raising a TimeoutError :
+        None waits as long as needed, 0 tries only once (non-blocking)
+        """
+        if timeout is not None and timeout < 0:
+            raise ValueError("timeout must be positive")
+        self.lock_timeout = timeout
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool):
+        """
+        Locks the file against the other processes : shared to read it, exclusive to read-modify-write it
+
+        The lock is taken on a '.lock' file next to it since the file itself is truncated by the writings.
+        The lock of the threads is taken first, and a nested call keeps the lock already held by the model.
+        """
+        with self.lock:
+            if fcntl is None or not self.FILE_LOCKING or not self.filename or self.file_lock is not None:
+                yield
+                return
+
+            lock_file = open(f"{self.filename}.lock", "a")
+            operation = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+            start = monotonic()
+            try:
+                if self.lock_timeout is None:
+                    fcntl.flock(lock_file, operation)
+                else:
+                    while True:
+                        try:
+                            fcntl.flock(lock_file, operation | fcntl.LOCK_NB)
+                            break
+                        except BlockingIOError:
+                            if monotonic() - start >= self.lock_timeout:
+                                raise TimeoutError(f"'{self.filename}' is locked by another process")
+                            sleep(0.01)
+            except BaseException:
+                lock_file.close()
+                raise
+
+            lock_wait = monotonic() - start
+            self.lock_count += 1
+            self.lock_wait_time += lock_wait
+            self.max_lock_wait = max(self.max_lock_wait, lock_wait)
+
+            self.file_lock = lock_file
+            try:
+                yield
+            finally:
+                self.file_lock = None
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+                lock_file.close()
+
+    def lock_stats(self) -> dict:
+        return {"locks": self.lock_count,
+                "wait_time": self.lock_wait_time,
+                "max_wait": self.max_lock_wait}
+
+    def _record_change(self, operation: str, list_idx: int, object_item=None) -> None:
+        """ Keeps a modification of this model in the journal and publishes it once written (see _publish_change) """
+        values = None if object_item is None else tuple(getattr(object_item, name) for name in self.field_names)
+        change = Model_Change(self.store_generation, operation, list_idx, values)
+        self.journal.append(change)
+        if self.dirty_since is None:    # not waiting for a flush (write-behind mode)
+            if self.journal_persisted:
+                self._append_to_journal_file(change)
+            self._publish_change(operation, list_idx, values)
+
+    def _publish_change(self, operation: str, list_idx: int = None, values: tuple = None) -> None:
+        """
+        Publishes a modification written in the file (called with the exclusive lock) as a compact event
+        (store_generation, timestamp, operation, list_idx, values) applied by the models of the other processes
+        """
+        if not self.CHANGE_BUS or not self.filename or self.dirty_since is not None:
+            return  # no bus, or not written yet (write-behind mode)
+        change_bus = self.change_bus
+        if change_bus is None:  # no observer : publishes without receiving the events of the others
+            if self.change_publisher is None:
+                self.change_publisher = Change_Bus(f"{os.path.abspath(self.filename)}.bus")
+            change_bus = self.change_publisher
+        change_bus.publish((self.store_generation, self.last_modified_timestamp, operation, list_idx, values))
+
+    def _on_change_event(self, event) -> None:
+        """ Applies a modification published by another process, or reads the file if an event has been missed """
+        store_generation, timestamp, operation, list_idx, values = event
+        with self.lock:
+            if self.dirty_since is not None or (self.loaded and store_generation <= self.store_generation):
+                return  # overwritten by the next flush, or already read from the file
+            try:
+                if not self.loaded:
+                    raise LookupError("not read yet")   # the file will be read at the first access
+                if store_generation != self.store_generation + 1:
+                    raise LookupError("missing events")
+                if operation == "create":
+                    self.object_list.append(self.object_type(*values))
+                elif operation == "update":
+                    self._check_index(list_idx)
+                    self.object_list[list_idx] = self.object_type(*values)
+                elif operation == "delete":
+                    self._check_index(list_idx)
+                    del self.object_list[list_idx]
+                else:
+                    raise LookupError(operation)
+                self.store_generation = store_generation
+                self.last_modified_timestamp = timestamp    # the file observer will ignore this modification
+                self.journal.append(Model_Change(store_generation, operation, list_idx, values))
+                self.generation += 1
+                self.changes_applied += 1
+            except (LookupError, ValueError):
+                if self.loaded:
+                    self._get_file_objects_with_last_timestamp()
+                    self.changes_reloaded += 1
+
+        self._notify_file_modified(event)
+
+    def change_bus_stats(self) -> dict:
+        change_buses = [change_bus for change_bus in (self.change_bus, self.change_publisher) if change_bus is not None]
+        return {"available": any(change_bus.available for change_bus in change_buses),
+                "published": sum(change_bus.published_count for change_bus in change_buses),
+                "received": sum(change_bus.received_count for change_bus in change_buses),
+                "applied": self.changes_applied,
+                "reloaded": self.changes_reloaded}
+
+    def set_journal(self, size: int = JOURNAL_SIZE, persisted: bool = False) -> None:
+        """
+        Keeps the last 'size' modifications for changes(), also appended to a '.journal' file next to the file
+        if 'persisted', so the modifications of the other processes (using a persisted journal too) are known
+        even without the change bus
+        """
+        if size <= 0:
+            raise ValueError("size must be positive")
+        if persisted and not self.filename:
+            raise ValueError(f"{self.object_type.__name__} objects are not stored in a file")
+        with self.lock:
+            self.journal = deque(self.journal, maxlen=size)
+            self.journal_persisted = persisted
+
+    def _append_to_journal_file(self, change: Model_Change) -> None:
+        """
+        Called with the exclusive lock, the file is compacted to the last modifications from time to time
+        (readable and writable only by the user, like the snapshot)
+        """
+        journal_filename = f"{self.filename}.journal"
+        with open(os.open(journal_filename, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600), "ab") as journal_file:
+            pickle.dump(change, journal_file)
+        self.journal_appended += 1
+        if self.journal_appended % self.journal.maxlen == 0:
+            changes = self._read_journal_file()[-self.journal.maxlen:]
+            temporary_filename = f"{journal_filename}.{os.getpid()}"
+            if os.path.exists(temporary_filename):
+                os.remove(temporary_filename)   # left by a process which has been stopped while writing it
+            with open(os.open(temporary_filename, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), "wb") as journal_file:
+                for change in changes:
+                    pickle.dump(change, journal_file)
+            os.replace(temporary_filename, journal_filename)
+
+    def _read_journal_file(self) -> list:
+        """ The journal is only unpickled when it belongs to the user and cannot be written by the others """
+        changes = []
+        try:
+            with open(f"{self.filename}.journal", "rb") as journal_file:
+                if not self._is_private_file(journal_file):
+                    return changes
+                while True:
+                    changes.append(pickle.load(journal_file))
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            pass    # end of the journal (or last modification partially written)
+        return changes
+
+    def changes(self, since: int) -> list:
+        """
+        Returns the ordered Model_Change (create, update or delete) made since the version 'since', or a single
+        Model_Reset with all the objects when they are not all known (journal truncated, modified by a program
+        without journal...)
+
+        The version is the store_generation : the 'version' of the last change (or of the reset) is the next 'since'.
+        """
+        with self._file_lock(exclusive=False):
+            self._reload_if_outdated()
+            version = self.store_generation
+            if since >= version:
+                return []
+
+            changes = [change for change in self.journal if change.version > since]
+            if self._is_complete(changes, since, version):
+                return changes
+            if self.journal_persisted:
+                changes = [change for change in self._read_journal_file() if since < change.version <= version]
+                if self._is_complete(changes, since, version):
+                    return changes
+            return [Model_Reset(version, self.read(reload=False))]
+
+    @staticmethod
+    def _is_complete(changes: list, since: int, version: int) -> bool:
+        """ True if the changes are all the modifications from 'since' to 'version' """
+        return [change.version for change in changes] == list(range(since + 1, version + 1)) \
+            and all(change.operation != "reset" for change in changes)
+
+    def current_generation(self) -> int:
+        """ Returns the generation of the object_list, reloaded before if the file has been modified from outside """
+        self._ensure_loaded()
+        if self.filename and self.dirty_since is None \
+                and os.path.getmtime(self.filename) != self.last_modified_timestamp:
+            self._get_file_objects_with_last_timestamp()
+        return self.generation
 
     def _get_file_objects(self) -> None:
         """ Can be overriden to get the object_list of 'object_type' from the file/db """
         ...
 
+    def _snapshot_key(self) -> tuple:
+        """ Identifies the content of the file : fields of the objects, size, modification time and hash """
+        file_stat = os.stat(self.filename)
+        file_hash = hashlib.blake2b(digest_size=16)
+        with open(self.filename, "rb") as file:
+            for chunk in iter(lambda: file.read(1 << 20), b""):
+                file_hash.update(chunk)
+        return tuple(self.field_names), file_stat.st_size, file_stat.st_mtime_ns, file_hash.hexdigest()
+
+    def _get_file_objects_from_snapshot(self) -> None:
+        """
+        Loads the objects from the '.snapshot' file when it has been made from the same content of the file,
+        otherwise reads the file with _get_file_objects and stores them in a new snapshot for the next start
+
+        Hashing the file is much faster than parsing it and converting each field (like the dates).
+        The snapshot is only unpickled when it belongs to the user and cannot be written by the others.
+        """
+        if not self.SNAPSHOT or not self.filename:
+            self._get_file_objects()
+            return
+
+        snapshot_key = self._snapshot_key()
+        try:
+            with open(f"{self.filename}.snapshot", "rb") as snapshot_file:
+                if self._is_private_file(snapshot_file) and pickle.load(snapshot_file) == snapshot_key:
+                    self.object_list = [self.object_type(*values) for values in pickle.load(snapshot_file)]
+                    self.snapshot_hits += 1
+                    return
+        except (OSError, EOFError, pickle.UnpicklingError, TypeError, ValueError):
+            pass    # no snapshot yet, or an incomplete one
+
+        self._get_file_objects()
+        self.snapshot_misses += 1
+        self._write_snapshot(snapshot_key)
+
+    @staticmethod
+    def _is_private_file(file) -> bool:
+        if not hasattr(os, "getuid"):
+            return True     # Windows : the permissions are not checked
+        file_stat = os.fstat(file.fileno())
+        return file_stat.st_uid == os.getuid() and not file_stat.st_mode & 0o022
+
+    def _mark_snapshot_outdated(self) -> None:
+        """
+        The snapshot is written again at exit instead of after each writing of the file, which would hash the file
+        and pickle all the objects each time
+        """
+        if not self.SNAPSHOT or not self.filename or self.snapshot_outdated:
+            return
+        self.snapshot_outdated = True
+        # Without keeping the model alive (the last writings of a write-behind model are flushed first)
+        model_ref = weakref.ref(self)
+        atexit.register(lambda: model_ref() is not None and model_ref()._write_outdated_snapshot())
+
+    def _write_outdated_snapshot(self) -> None:
+        """ Only written if the objects in memory are still the content of the file (not modified by another one) """
+        self.flush()
+        with self._file_lock(exclusive=False):
+            if self.snapshot_outdated and os.path.exists(self.filename) \
+                    and self.store_generation == self._read_store_generation() \
+                    and self.last_modified_timestamp == os.path.getmtime(self.filename):
+                self._write_snapshot()
+            self.snapshot_outdated = False
+
+    def _write_snapshot(self, snapshot_key: tuple = None) -> None:
+        """
+        Stores the values of the objects in memory, just read or written in the file, for the next start
+        (readable and writable only by the user)
+        """
+        if not self.SNAPSHOT or not self.filename:
+            return
+        snapshot_filename = f"{self.filename}.snapshot"
+        temporary_filename = f"{snapshot_filename}.{os.getpid()}"
+        try:
+            if snapshot_key is None:
+                snapshot_key = self._snapshot_key()
+            if os.path.exists(temporary_filename):
+                os.remove(temporary_filename)   # left by a process which has been stopped while writing it
+            with open(os.open(temporary_filename, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), "wb") as snapshot_file:
+                pickle.dump(snapshot_key, snapshot_file, pickle.HIGHEST_PROTOCOL)
+                pickle.dump([tuple(getattr(object_item, name) for name in self.field_names)
+                             for object_item in self.object_list], snapshot_file, pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary_filename, snapshot_filename)   # never read while partially written
+        except OSError:
+            pass    # read-only directory : the file will be read again next time
+
     def _on_file_modified_checking_timestamp(self, *args, **kwargs) -> None:
         """ Equivalent to an inherited decorator for the function/method _on_file_modified """
         if self.filename:
             # Check if the timestamp of the last modification is the same that the one we already got
             sleep(0.1)  # To let the file have the time to be stored properly before taking the modified timestamp
             current_timestamp = os.path.getmtime(self.filename)
-            creation_timestamp = os.path.getctime(self.filename)
+            # getctime is the creation time on Windows only, elsewhere it is also changed by each modification
+            creation_timestamp = os.path.getctime(self.filename) if os.name == "nt" else None
             if current_timestamp != self.last_modified_timestamp and current_timestamp != creation_timestamp:
-                if self._on_file_modified is not None :
-                    self._on_file_modified( self, *args, **kwargs)
+                self._notify_file_modified(*args, **kwargs)
 
     def _convert_to_object_list(self, object_list):
         self.object_list = []
@@ -173,19 +761,28 @@ class Generic_CRUD_Model(Observable):           ### (Observable) Added to share
 
     def create(self, *args) -> None:
         """ Create a new 'object_type' to the end of the file """
-        self._check_args(*args)
-        self._get_file_objects_with_last_timestamp()
-        object_item = self.object_type(*args)
-        self.object_list.append(object_item)
-        self._set_file_objects_with_last_timestamp()
+        with self._file_lock(exclusive=True):   # read-modify-write
+            self._check_args(*args)
+            self._reload_if_outdated()
+            object_item = self.object_type(*args)
+            self.object_list.append(object_item)
+            self._set_file_objects_with_last_timestamp()
+            self._record_change("create", len(self.object_list) - 1, object_item)
 
         ### Added to share the Model between Views
         self.notify_observers()
         ###
 
-    def read(self) -> list:
-        """ Return a list of tuple containing the values of 'object_type' objects """
-        self._get_file_objects_with_last_timestamp()
+    def read(self, reload: bool = True) -> list:
+        """
+        Return a list of tuple containing the values of 'object_type' objects
+
+        'reload' can be False to format the objects already loaded (by current_generation() for example)
+        """
+        if reload:
+            self._get_file_objects_with_last_timestamp()
+        else:
+            self._ensure_loaded()
 
         # Should not be attached to Generic_CRUD_Model but to the 'object_type' class
         def read_format(object_item):
@@ -195,24 +792,35 @@ class Generic_CRUD_Model(Observable):           ### (Observable) Added to share
         return [object_item.read_format() if hasattr(object_item, "read_format")
                 else read_format(object_item) for object_item in self.object_list]
 
-    def update(self, list_idx: int, *args) -> None:
-        """ Update all the values of the 'object_type' at the list_idx in the list of the file """
-        self._check_args(*args)
-        self._get_file_objects_with_last_timestamp()
-        self._check_index(list_idx)
-        self.object_list[list_idx] = self.object_type(*args)
-        self._set_file_objects_with_last_timestamp()
+    def update(self, list_idx: int, *args, expected_generation: int = None) -> None:
+        """
+        Update all the values of the 'object_type' at the list_idx in the list of the file
+
+        With 'expected_generation' (the store_generation when the objects were read), a Model_Conflict_Error is
+        raised instead of overwriting a modification made in the meantime
+        """
+        with self._file_lock(exclusive=True):   # read-modify-write
+            self._check_args(*args)
+            self._check_expected_generation(expected_generation)
+            self._reload_if_outdated()
+            self._check_index(list_idx)
+            self.object_list[list_idx] = self.object_type(*args)
+            self._set_file_objects_with_last_timestamp()
+            self._record_change("update", list_idx, self.object_list[list_idx])
 
         ### Added to share the Model between Views
         self.notify_observers()
         ###
 
-    def delete(self, list_idx: int) -> None:
-        """ Delete the 'object_type' at the list_idx in the list of the file """
-        self._get_file_objects_with_last_timestamp()
-        self._check_index(list_idx)
-        del self.object_list[list_idx]
-        self._set_file_objects_with_last_timestamp()
+    def delete(self, list_idx: int, expected_generation: int = None) -> None:
+        """ Delete the 'object_type' at the list_idx in the list of the file (see update for 'expected_generation') """
+        with self._file_lock(exclusive=True):   # read-modify-write
+            self._check_expected_generation(expected_generation)
+            self._reload_if_outdated()
+            self._check_index(list_idx)
+            del self.object_list[list_idx]
+            self._set_file_objects_with_last_timestamp()
+            self._record_change("delete", list_idx)
 
         ### Added to share the Model between Views
         self.notify_observers()
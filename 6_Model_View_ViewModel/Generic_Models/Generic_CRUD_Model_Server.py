@@ -0,0 +1,235 @@
+"""
+    Share a Generic CRUD Model between processes through a server owning the model
+"""
+import os
+import sys
+import threading
+from multiprocessing.connection import Listener, Client
+
+# Update sys.path to include the parent directory
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from Observer_patterns.Observables import Observable
+
+
+class Generic_CRUD_Model_Server:
+    """
+    Serves a single Generic_CRUD_Model to the other processes of the user through a Unix domain socket
+
+    Each request of a Generic_CRUD_Model_Client is a tuple (method_name, *args) answered by ("ok", result)
+    or ("error", exception), and the connections subscribed with ("subscribe",) receive ("changed", generation)
+    after each modification of the model. The processes only share one copy of the objects and one writer.
+    The result of a creation, an update or a deletion is the store generation of the modification.
+    """
+    METHODS = ("create", "read", "update", "delete", "query", "changes", "current_generation")
+
+    def __init__(self, model, socket_path: str):
+        self.model = model
+        self.socket_path = os.path.abspath(socket_path)
+        self.requests_lock = threading.Lock()   # the requests of all the clients are executed one by one
+        self.subscribers = []
+        self.subscribers_lock = threading.Lock()
+        self.listener = None
+
+        self.model.add_observer(self.notify_subscribers)
+
+    def serve_forever(self):
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)     # left by a server which has not been closed properly
+        self.listener = Listener(self.socket_path, family="AF_UNIX")
+        # only the processes of the same user connect (the process-wide umask is not changed, as the threads of the
+        # model may create files meanwhile : connecting needs the write permission, not given by the usual umask)
+        os.chmod(self.socket_path, 0o600)
+        try:
+            while True:
+                connection = self.listener.accept()
+                threading.Thread(target=self.handle_connection, args=(connection,), daemon=True).start()
+        except OSError:
+            pass    # closed
+        finally:
+            self.close()
+
+    def close(self):
+        self.model.remove_observer(self.notify_subscribers)
+        if self.listener is not None:
+            self.listener.close()   # removes the socket file
+            self.listener = None
+
+    def handle_connection(self, connection):
+        try:
+            while True:
+                method_name, *args = connection.recv()
+                if method_name == "subscribe":
+                    with self.subscribers_lock:
+                        self.subscribers.append(connection)
+                    return  # the connection is only used to send the notifications from now on
+                connection.send(self.execute(method_name, args))
+        except (EOFError, OSError):
+            connection.close()
+
+    def execute(self, method_name, args):
+        if method_name not in self.METHODS:
+            return "error", AttributeError(f"{self.model.__class__.__name__} has no method '{method_name}'")
+        try:
+            with self.requests_lock:
+                if method_name == "query":
+                    return "ok", self.query(*args)
+                if method_name == "read":
+                    return "ok", self.read()
+                if method_name == "create":
+                    self.model.create(*args)
+                    return "ok", self.model.store_generation    # version of the modification (see changes)
+                if method_name in ("update", "delete"):
+                    *args, expected_generation = args
+                    getattr(self.model, method_name)(*args, expected_generation=expected_generation)
+                    return "ok", self.model.store_generation
+                return "ok", getattr(self.model, method_name)(*args)
+        except Exception as e:
+            return "error", e
+
+    def read(self):
+        """
+        Returns the objects kept in memory by the model, without reading the file/db for each request : they are only
+        read again when it has been modified by a process which does not use the server (see current_generation)
+        """
+        self.model.current_generation()
+        return self.model.read(reload=False)
+
+    def query(self, field_values: dict):
+        """ Returns the (index, values) of the objects whose fields have the requested values """
+        field_indexes = {self.model.field_names.index(field_name): value for field_name, value in field_values.items()}
+        return [(index, values) for index, values in enumerate(self.read())
+                if all(values[field_index] == value for field_index, value in field_indexes.items())]
+
+    def notify_subscribers(self, *args, **kwargs):
+        """ Called by the model (and by its file observer) when it is modified """
+        with self.subscribers_lock:
+            for connection in list(self.subscribers):
+                try:
+                    connection.send(("changed", self.model.store_generation))
+                except OSError:     # the client has been closed
+                    self.subscribers.remove(connection)
+                    connection.close()
+
+
+class Generic_CRUD_Model_Client(Observable):
+    """
+    Same interface as a Generic_CRUD_Model, but executed by the Generic_CRUD_Model_Server of the socket
+
+    The observers are notified when any process modifies the model, and the list read is kept until the next
+    modification so the views of the process can read it without asking the server again.
+    The generation is incremented once for each store generation of the server (received with the result of a
+    modification of this client, or with the notification of the server, whichever comes first).
+    """
+
+    def __init__(self, socket_path: str):
+        super().__init__()
+        self.socket_path = os.path.abspath(socket_path)
+        self.filename = None    # no file to watch on the client side
+        self.connection = Client(self.socket_path, family="AF_UNIX")
+        self.connection_lock = threading.Lock()
+
+        self.generation = 0     # incremented by each modification (of any process)
+        self.store_generation = None
+        self.generation_lock = threading.Lock()
+        self.read_generation = None
+        self.read_list = []
+
+        # A second connection receives the modifications notified by the server
+        self.subscription = Client(self.socket_path, family="AF_UNIX")
+        self.subscription.send(("subscribe",))
+        self.subscription_thread = threading.Thread(target=self._receive_notifications, daemon=True)
+        self.subscription_thread.start()
+
+    def close(self):
+        self.connection.close()
+        self.subscription.close()
+
+    def _request(self, method_name, *args):
+        with self.connection_lock:
+            self.connection.send((method_name, *args))
+            status, result = self.connection.recv()
+        if status == "error":
+            raise result
+        return result
+
+    def _receive_notifications(self):
+        try:
+            while True:
+                _, store_generation = self.subscription.recv()
+                self._set_store_generation(store_generation)
+                self.notify_observers()
+        except (EOFError, OSError):
+            pass    # closed
+
+    def _set_store_generation(self, store_generation: int) -> None:
+        """ Increments the generation if the store generation of the server is new (not counted twice) """
+        with self.generation_lock:
+            if self.store_generation is None or store_generation > self.store_generation:
+                self.store_generation = store_generation
+                self.generation += 1
+
+    def current_generation(self) -> int:
+        return self.generation
+
+    def changes(self, since: int) -> list:
+        """ Returns the Model_Change or the Model_Reset of the model of the server since the version 'since' """
+        return self._request("changes", since)
+
+    def create(self, *args) -> None:
+        # without waiting for the notification of the server
+        self._set_store_generation(self._request("create", *args))
+
+    def read(self, reload: bool = True) -> list:
+        generation = self.generation
+        if generation != self.read_generation:
+            self.read_list = self._request("read")
+            self.read_generation = generation
+        return list(self.read_list)
+
+    def query(self, **field_values) -> list:
+        """ Returns the (index, values) of the objects whose fields have these values, like query(priority=1) """
+        return self._request("query", field_values)
+
+    def update(self, list_idx: int, *args, expected_generation: int = None) -> None:
+        self._set_store_generation(self._request("update", list_idx, *args, expected_generation))
+
+    def delete(self, list_idx: int, expected_generation: int = None) -> None:
+        self._set_store_generation(self._request("delete", list_idx, expected_generation))
+
+
+if __name__ == "__main__":
+    import time
+    from datetime import datetime
+    from Generic_CRUD_Model import Generic_CRUD_Model
+
+    class Task:
+
+        def __init__(self, title: str, priority: int, modified_on: datetime = datetime.now()):
+            self.title: str = title
+            self.priority: int = priority
+            self.modified_on: datetime = modified_on
+
+    # The server owns the model (a simple list here) and is usually started in its own process
+    server = Generic_CRUD_Model_Server(Generic_CRUD_Model(Task), "Task.sock")
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    time.sleep(0.1)
+
+    client1 = Generic_CRUD_Model_Client("Task.sock")
+    client2 = Generic_CRUD_Model_Client("Task.sock")
+    client2.add_observer(lambda *args, **kwargs: print("Client 2 notified"))
+
+    client1.create("A first task", 3, datetime.now())
+    client1.create("A second task", 1, datetime.now())
+    time.sleep(0.1)
+    print(client2.read())
+    # Output:
+    # Client 2 notified
+    # Client 2 notified
+    # [('A first task', 3, datetime.datetime(...)), ('A second task', 1, datetime.datetime(...))]
+
+    print(client2.query(priority=1))
+    # Output: [(1, ('A second task', 1, datetime.datetime(...)))]
+
+    client1.close()
+    client2.close()
+    server.close()
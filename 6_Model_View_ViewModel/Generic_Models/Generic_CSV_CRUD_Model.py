@@ -28,7 +28,7 @@ class Generic_CSV_CRUD_Model(Generic_CRUD_Model):
 
     def _init_file_objects(self) -> None:
         try :
-            self._get_file_objects()
+            self._get_file_objects_with_last_timestamp(from_snapshot=True)
         except FileNotFoundError :
             self._set_file_objects()
 
@@ -39,6 +39,7 @@ class Generic_CSV_CRUD_Model(Generic_CRUD_Model):
             writer.writeheader()
             for object_item in self.object_list:
                 writer.writerow(object_item.__dict__)
+            self._sync_file(file)
 
     def _get_file_objects(self) -> None:
         """ specific to CSV files """
@@ -146,3 +147,23 @@ if __name__ == "__main__":
     Here is the 'Task.csv' file at this step :
     title,priority,active,modified_on,weight
     """
+
+    # A model built with only an 'on_modified' function (no observer) is notified of the modifications of the others
+    import time
+    modified_events = []
+    watching_tasks = Generic_CSV_CRUD_Model(Task, lambda *args, **kwargs: modified_events.append(args[1]))
+    watching_tasks.read()
+    time.sleep(0.1)
+    with open("Task.csv", "a", newline='') as csv_file:  # modified by another program
+        csv_file.write("An external task,2,True,2023-07-25 20:57:08.600000,1.0\n")
+    time.sleep(1)
+    print(watching_tasks.file_observer_handler is not None, len(modified_events) > 0)
+    # Output: True True
+
+    # The modification of the other program has a new version : changes() returns a Model_Reset with all the tasks
+    version = watching_tasks.changes(-1)[-1].version
+    time.sleep(0.1)
+    with open("Task.csv", "a", newline='') as csv_file:
+        csv_file.write("Another external task,3,True,2023-07-25 20:57:08.700000,1.0\n")
+    print([type(change).__name__ for change in watching_tasks.changes(version)])
+    # Output: ['Model_Reset']
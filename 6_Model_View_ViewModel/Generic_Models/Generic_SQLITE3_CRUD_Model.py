@@ -2,12 +2,14 @@
     Create a Generic CRUD Model for SQLITE3 File
 """
 import sqlite3
+import threading
+import weakref
 from datetime import datetime   # used in _type_to_sqlite3
 
 if __name__ == "__main__":  # To test the sample at the end of the file
-    from Generic_CRUD_Model import Generic_CRUD_Model
+    from Generic_CRUD_Model import Generic_CRUD_Model, Model_Change, Model_Conflict_Error
 else:   # if used as module
-    from .Generic_CRUD_Model import Generic_CRUD_Model
+    from .Generic_CRUD_Model import Generic_CRUD_Model, Model_Change, Model_Conflict_Error
 
 
 class Generic_SQLITE3_CRUD_Model(Generic_CRUD_Model):
@@ -28,18 +30,103 @@ class Generic_SQLITE3_CRUD_Model(Generic_CRUD_Model):
         self.cursor = None
         #self.drop_table_if_exists = drop_table_if_exists
 
+        # Instead of the events on the .sqlite3 file (for any table, and missing the modifications only written in the
+        # WAL), a persistent connection polls PRAGMA data_version and the change counter of the 'object_type' table
+        self.change_db = None
+        self.table_change_count = None  # change counter of the table when the objects were read
+        self.previous_table_change_count = None
+        self.poll_stop_event = None
+
         # init the object_type, the field_names, the field_types, an object_list, the filename, call init_file_objects
         super().__init__(object_type, notify_function, "SQLITE3")
-        # The system will notify the changes on the .sqlite3 file but not on the specific 'object_type' table.
-        # For another use of this sqlite3 database, a better notification mechanism might be needed to be more accurate.
+
+    def set_write_behind(self, interval: float = None) -> None:
+        if interval is not None:
+            raise TypeError(f"{self.__class__.__name__} writes each request in the database, "
+                            f"write-behind is only available for the models written in a single file")
+
+    def set_journal(self, size: int = Generic_CRUD_Model.JOURNAL_SIZE, persisted: bool = False) -> None:
+        if persisted:
+            raise TypeError(f"{self.__class__.__name__} does not persist its journal, the database is not locked "
+                            f"by the model between the processes")
+        super().set_journal(size)
+
+    FILE_LOCKING = False    # the database is locked by SQLite itself
+    CHANGE_BUS = False  # the order of the rows is decided by the database
+    SNAPSHOT = False    # the modifications of the database are not always visible on the file (WAL)
+
+    CHANGE_POLL_INTERVAL = 0.05     # seconds between two PRAGMA data_version
+
+    # incremented by the triggers of each table at each modification of its rows
+    CHANGE_COUNTERS_TABLE = "_Model_Changes"
+
+    # PRAGMA synchronous of each durability level (the directory is synchronised by SQLite with EXTRA)
+    SYNCHRONOUS_PRAGMAS = {"none": "OFF", "flush": "NORMAL", "fsync": "FULL", "fsync+dir": "EXTRA"}
 
     def open_db(self):
         self.db = sqlite3.connect(self.filename)
         self.cursor = self.db.cursor()
+        if self.durability is not None:
+            self.cursor.execute(f"PRAGMA synchronous = {self.SYNCHRONOUS_PRAGMAS[self.durability]}")
 
     def close_db(self):
         self.db.close()
 
+    def _read_store_generation(self) -> int:
+        """ The generation is stored in the header of the database (PRAGMA user_version) """
+        self.open_db()
+        store_generation = self.cursor.execute("PRAGMA user_version").fetchone()[0]
+        self.close_db()
+        return store_generation
+
+    def _write_store_generation(self, store_generation: int) -> None:
+        # incremented by _execute_modification in the same transaction as the modification
+        self.store_generation = store_generation
+
+    def _execute_modification(self, statement: str, expected_generation: int = None) -> None:
+        """ Executes the statement and increments the generation in a single transaction """
+        self.open_db()
+        try:
+            self.cursor.execute("BEGIN IMMEDIATE")  # locks the database for writing until the commit
+            store_generation = self.cursor.execute("PRAGMA user_version").fetchone()[0]
+            if expected_generation is not None and store_generation != expected_generation:
+                raise Model_Conflict_Error(f"{self.filename} is at the generation {store_generation} "
+                                           f"instead of {expected_generation}")
+            self.cursor.execute(statement)
+            self.cursor.execute(f"PRAGMA user_version = {store_generation + 1}")
+            change_count = self._read_table_change_count(self.cursor)
+            self.db.commit()
+        except BaseException:
+            self.db.rollback()
+            raise
+        finally:
+            self.close_db()
+        self.store_generation = store_generation + 1
+        self.table_change_count = change_count  # not a modification from outside when the objects are reloaded
+
+    def _is_modified_without_generation(self, previous_timestamp) -> bool:
+        """ The triggers count the modifications of the programs not using the model (without user_version) """
+        return self.previous_table_change_count is not None \
+            and self.table_change_count != self.previous_table_change_count
+
+    def _increment_store_generation(self) -> None:
+        """ Increments PRAGMA user_version in a transaction, unless a model of another process has already done it """
+        self.open_db()
+        try:
+            self.cursor.execute("BEGIN IMMEDIATE")
+            store_generation = self.cursor.execute("PRAGMA user_version").fetchone()[0]
+            if store_generation == self.store_generation:
+                store_generation += 1
+                self.cursor.execute(f"PRAGMA user_version = {store_generation}")
+            self.db.commit()
+        except BaseException:
+            self.db.rollback()
+            raise
+        finally:
+            self.close_db()
+        self.store_generation = store_generation
+        self.journal.append(Model_Change(self.store_generation, "reset", None, None))
+
     def _init_file_objects(self):
         sqlite3_mapping = {
             'int': 'INTEGER NOT NULL',
@@ -58,8 +145,18 @@ class Generic_SQLITE3_CRUD_Model(Generic_CRUD_Model):
 
         statement = f"CREATE TABLE IF NOT EXISTS {self.object_type.__name__} ({', '.join(field_list)})"
 
+        table_name = self.object_type.__name__
         self.open_db()
         self.cursor.execute(statement)
+        # Change counter maintained by SQLite itself, even for the modifications of the programs not using the model
+        self.cursor.execute(f"CREATE TABLE IF NOT EXISTS {self.CHANGE_COUNTERS_TABLE} "
+                            f"(table_name TEXT PRIMARY KEY, change_count INTEGER NOT NULL)")
+        self.cursor.execute(f"INSERT OR IGNORE INTO {self.CHANGE_COUNTERS_TABLE} VALUES ('{table_name}', 0)")
+        for operation in ("INSERT", "UPDATE", "DELETE"):
+            self.cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {table_name}_{operation.lower()}_change "
+                                f"AFTER {operation} ON {table_name} BEGIN "
+                                f"UPDATE {self.CHANGE_COUNTERS_TABLE} SET change_count = change_count + 1 "
+                                f"WHERE table_name = '{table_name}'; END")
         self.db.commit()
         self.close_db()
 
@@ -71,11 +168,86 @@ class Generic_SQLITE3_CRUD_Model(Generic_CRUD_Model):
 
         self.open_db()
         sqlite3_values_list = [sqlite3_item for sqlite3_item in self.cursor.execute(statement)]
+        self.store_generation = self.cursor.execute("PRAGMA user_version").fetchone()[0]
+        self.previous_table_change_count = self.table_change_count
+        self.table_change_count = self._read_table_change_count(self.cursor)
         self.close_db()
 
         # Convert the values from SQLITE3 to the type of 'object_type'
         self._convert_to_object_list(sqlite3_values_list)
 
+    def _read_table_change_count(self, cursor) -> int:
+        row = cursor.execute(f"SELECT change_count FROM {self.CHANGE_COUNTERS_TABLE} WHERE table_name = ?",
+                             (self.object_type.__name__,)).fetchone()
+        return row[0] if row else 0
+
+    def _open_change_db(self):
+        """ Persistent connection (PRAGMA data_version only changes for the commits of the other connections) """
+        if self.change_db is None:
+            self.change_db = sqlite3.connect(self.filename, check_same_thread=False)
+        return self.change_db
+
+    def _start_watcher(self) -> None:
+        with self.lock:
+            if self.poll_stop_event is not None:
+                return
+            self.poll_stop_event = threading.Event()
+            threading.Thread(target=self._poll_changes, args=(weakref.ref(self), self.poll_stop_event),
+                             daemon=True).start()
+
+    def _stop_watcher(self) -> None:
+        with self.lock:
+            if self.poll_stop_event is not None:
+                self.poll_stop_event.set()
+                self.poll_stop_event = None
+            if self.change_db is not None:
+                self.change_db.close()
+                self.change_db = None
+
+    @staticmethod
+    def _poll_changes(model_ref, stop_event) -> None:
+        """ Checks the change counter of the table only when the database has been modified (weak ref to the model) """
+        data_version = None
+        while True:
+            model = model_ref()
+            if model is None or stop_event.wait(model.CHANGE_POLL_INTERVAL):
+                return
+            try:
+                with model.lock:
+                    if stop_event.is_set():
+                        return
+                    current_data_version = model._open_change_db().execute("PRAGMA data_version").fetchone()[0]
+                if current_data_version != data_version:
+                    data_version = current_data_version
+                    model._reload_if_table_changed(notify=True)
+            except sqlite3.Error:
+                pass    # locked or not created yet : checked again at the next interval
+            del model
+
+    def _reload_if_table_changed(self, notify: bool = False) -> None:
+        """ Reloads the objects only if the rows of the 'object_type' table have been modified since they were read """
+        with self.lock:
+            if not self.loaded:
+                return  # read at the first access
+            change_count = self._read_table_change_count(self._open_change_db())
+            if change_count == self.table_change_count:
+                return  # other tables, or the modifications of this model
+            self._get_file_objects_with_last_timestamp()
+            self.generation += 1    # even if the modification time of the file does not change (WAL)
+        if notify:
+            self._notify_file_modified(self.object_type.__name__, change_count)
+
+    def _reload_if_outdated(self) -> None:
+        """ The modification time of the file does not always change (WAL) : the change counter is checked too """
+        super()._reload_if_outdated()
+        self._reload_if_table_changed()
+
+    def current_generation(self) -> int:
+        """ Returns the generation of the object_list, reloaded before if its table has been modified from outside """
+        self._ensure_loaded()
+        self._reload_if_table_changed()
+        return self.generation
+
     @staticmethod
     def _type_to_sqlite3(v):
         """ Convert the type of 'object_type' to compatible SQLITE3 type """
@@ -94,6 +266,7 @@ class Generic_SQLITE3_CRUD_Model(Generic_CRUD_Model):
 
     def create(self, *args) -> None:
         """ Create a new 'object_type' in the database """
+        self._ensure_loaded()
         self._check_args(*args)
         # Convert into a 'object_type' object before to store in database to get the possible default values
         object_item = self.object_type(*args)
@@ -103,20 +276,21 @@ class Generic_SQLITE3_CRUD_Model(Generic_CRUD_Model):
                     f"({', '.join(object_item.__dict__.keys())}) " \
                     f"VALUES ({', '.join(compatible_object_item_values)})"
 
-        self.open_db()
-        self.cursor.execute(statement)
-        self.db.commit()
-        self.close_db()
+        with self.lock:     # read again before the poll of the changes (see _reload_if_table_changed)
+            self._execute_modification(statement)
 
-        self._get_file_objects_with_last_timestamp()
+            self.generation += 1    # even if the modification time of the file does not change
+            self._get_file_objects_with_last_timestamp()
+            self._record_change("create", len(self.object_list) - 1, object_item)
 
         ### Added to share the Model between Views
         self.notify_observers()
         ###
 
 
-    def update(self, list_idx: int, *args) -> None:
+    def update(self, list_idx: int, *args, expected_generation: int = None) -> None:
         """ Update all the values of the 'object_type' at the list_idx in the list of the file """
+        self._ensure_loaded()
         self._check_index(list_idx)
         object_old = self.object_list[list_idx]
         compatible_object_old_values = [self._type_to_sqlite3(v) for v in object_old.__dict__.values()]
@@ -130,19 +304,20 @@ class Generic_SQLITE3_CRUD_Model(Generic_CRUD_Model):
                     f"({', '.join(object_new.__dict__.keys())})=({', '.join(compatible_object_new_values)}) " \
                     f"WHERE ({', '.join(object_old.__dict__.keys())})=({', '.join(compatible_object_old_values)})"
 
-        self.open_db()
-        self.cursor.execute(statement)
-        self.db.commit()
-        self.close_db()
+        with self.lock:     # read again before the poll of the changes (see _reload_if_table_changed)
+            self._execute_modification(statement, expected_generation)
 
-        self._get_file_objects_with_last_timestamp()
+            self.generation += 1    # even if the modification time of the file does not change
+            self._get_file_objects_with_last_timestamp()
+            self._record_change("update", list_idx, object_new)
 
         ### Added to share the Model between Views
         self.notify_observers()
         ###
 
-    def delete(self, list_idx: int) -> None:
+    def delete(self, list_idx: int, expected_generation: int = None) -> None:
         """ Delete the 'object_type' at the list_idx in the list of the file """
+        self._ensure_loaded()
         self._check_index(list_idx)
         # Convert into a 'object_type' object before to store in database to get the possible default values
         object_item = self.object_list[list_idx]
@@ -151,12 +326,12 @@ class Generic_SQLITE3_CRUD_Model(Generic_CRUD_Model):
         statement = f"DELETE FROM {self.object_type.__name__} " \
                     f"WHERE ({', '.join(object_item.__dict__.keys())})=({', '.join(compatible_object_item_values)})"
 
-        self.open_db()
-        self.cursor.execute(statement)
-        self.db.commit()
-        self.close_db()
+        with self.lock:     # read again before the poll of the changes (see _reload_if_table_changed)
+            self._execute_modification(statement, expected_generation)
 
-        self._get_file_objects_with_last_timestamp()
+            self.generation += 1    # even if the modification time of the file does not change
+            self._get_file_objects_with_last_timestamp()
+            self._record_change("delete", list_idx)
 
         ### Added to share the Model between Views
         self.notify_observers()
@@ -265,3 +440,13 @@ if __name__ == "__main__":
     |-----------------|-----------|--------|----------------------------|--------|
 
     """
+
+    # A row inserted by another connection (without PRAGMA user_version) has a new version counted by the triggers :
+    # changes() returns a Model_Reset with all the tasks
+    version = tasks.changes(-1)[-1].version
+    other_db = sqlite3.connect(tasks.filename)
+    other_db.execute("INSERT INTO Task VALUES ('An external task', 2, 1, '2023-07-25 21:00:14.100000', 1.0)")
+    other_db.commit()
+    other_db.close()
+    print([type(change).__name__ for change in tasks.changes(version)], len(tasks.read()))
+    # Output: ['Model_Reset'] 3
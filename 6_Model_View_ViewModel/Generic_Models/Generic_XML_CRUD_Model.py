@@ -28,7 +28,7 @@ class Generic_XML_CRUD_Model(Generic_CRUD_Model):
 
     def _init_file_objects(self) -> None:
         try:
-            self._get_file_objects()
+            self._get_file_objects_with_last_timestamp(from_snapshot=True)
         except FileNotFoundError:
             self._set_file_objects()
 
@@ -50,7 +50,9 @@ class Generic_XML_CRUD_Model(Generic_CRUD_Model):
         ET.indent(objects_root)
         # and write it at the root of the file
         tree = ET.ElementTree(objects_root)
-        tree.write(self.filename, encoding="utf-8", xml_declaration=True)
+        with open(self.filename, 'wb') as file:
+            tree.write(file, encoding="utf-8", xml_declaration=True)
+            self._sync_file(file)
 
     def _get_file_objects(self) -> None:
         """ specific to XML files """
@@ -0,0 +1,147 @@
+"""
+    Publish the modifications of a shared file to the other processes through Unix datagram sockets
+"""
+import os
+import pickle
+import socket
+import stat
+import threading
+
+
+class Change_Bus:
+    """
+    Local publish/subscribe channel between the processes using the same file
+
+    Each subscriber binds a datagram socket in 'bus_directory' and 'publish' sends the event to all the other sockets
+    of this directory, so the other processes receive it without waiting for the file system events.
+    Without 'notify_function', the bus only publishes (no socket bound, so a writer without subscriber publishes too).
+    'available' is False when the Unix sockets cannot be used (Windows, path too long...), or when the directory
+    is not private to the user : the events received are unpickled, so only the processes of the user may send them.
+    """
+    MAX_EVENT_SIZE = 65536  # the bigger events are not published (the file observer still notices the modification)
+
+    def __init__(self, bus_directory: str, notify_function: callable = None):
+        self.bus_directory = os.path.abspath(bus_directory)
+        self.notify_function = notify_function
+        self.socket_path = None
+        self.receiver = None
+        self.sender = None
+        self.published_count = 0
+        self.received_count = 0
+
+        if not hasattr(socket, "AF_UNIX"):
+            return
+        try:
+            os.makedirs(self.bus_directory, mode=0o700, exist_ok=True)
+            self._check_private_directory()
+            if notify_function is not None:
+                self.socket_path = os.path.join(self.bus_directory, f"{os.getpid()}-{id(self)}.sock")
+                self.receiver = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+                # only reachable by the processes of the user through the private directory
+                self.receiver.bind(self.socket_path)
+            self.sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            self.sender.setblocking(False)  # a subscriber which does not read its events does not block the writer
+        except OSError:
+            self.stop()
+            return
+
+        if self.receiver is not None:
+            threading.Thread(target=self._receive_events, args=(self.receiver,), daemon=True).start()
+
+    def _check_private_directory(self) -> None:
+        """ Raises a PermissionError if the directory (not a link) is not owned by the user or writable by others """
+        directory_stat = os.lstat(self.bus_directory)
+        if not stat.S_ISDIR(directory_stat.st_mode) or directory_stat.st_uid != os.getuid() \
+                or directory_stat.st_mode & 0o022:
+            raise PermissionError(f"'{self.bus_directory}' is not a private directory of the user")
+
+    @property
+    def available(self) -> bool:
+        return self.sender is not None
+
+    def stop(self) -> None:
+        if self.sender is not None:
+            if self.receiver is not None:
+                try:
+                    self.sender.sendto(b"", self.socket_path)   # wakes up the receiving thread which closes its socket
+                except OSError:
+                    self.receiver.close()
+            self.sender.close()
+            self.sender = None
+        elif self.receiver is not None:
+            self.receiver.close()
+        self.receiver = None
+        if self.socket_path is not None:
+            try:
+                os.remove(self.socket_path)
+            except FileNotFoundError:
+                pass
+            self.socket_path = None
+
+    def publish(self, event) -> None:
+        """ Sends the event to the subscribers of the other processes (at most once, without acknowledgement) """
+        if self.sender is None:
+            return
+        data = pickle.dumps(event)
+        if len(data) > self.MAX_EVENT_SIZE:
+            return
+        for socket_name in os.listdir(self.bus_directory):
+            socket_path = os.path.join(self.bus_directory, socket_name)
+            if socket_path == self.socket_path:
+                continue
+            try:
+                self.sender.sendto(data, socket_path)
+                self.published_count += 1
+            except (ConnectionRefusedError, FileNotFoundError):
+                try:
+                    os.remove(socket_path)  # left by a process which has not been stopped properly
+                except OSError:
+                    pass
+            except OSError:
+                pass    # full buffer : the subscriber will notice the missing generation
+
+    def _receive_events(self, receiver) -> None:
+        try:
+            while True:
+                data = receiver.recv(self.MAX_EVENT_SIZE)
+                if not data:
+                    break   # sent by stop
+                try:
+                    event = pickle.loads(data)
+                except Exception:
+                    continue
+                self.received_count += 1
+                self.notify_function(event)
+        except OSError:
+            pass
+        finally:
+            receiver.close()
+
+
+if __name__ == "__main__":
+    import time
+
+    # Usually in different processes using the same file
+    bus1 = Change_Bus("shared_file.txt.bus", lambda event: print(f"bus1 received {event}"))
+    bus2 = Change_Bus("shared_file.txt.bus", lambda event: print(f"bus2 received {event}"))
+    print(bus1.available, bus2.available)
+    # Output: True True
+
+    bus1.publish((1, "update", 0, ("A modified line",)))
+    time.sleep(0.1)
+    # Output: bus2 received (1, 'update', 0, ('A modified line',))
+
+    # A process which only writes the file publishes without receiving
+    publisher = Change_Bus("shared_file.txt.bus")
+    publisher.publish((2, "delete", 0, None))
+    time.sleep(0.1)
+    print(publisher.available, publisher.published_count)
+    # Output:
+    # bus1 received (2, 'delete', 0, None)
+    # bus2 received (2, 'delete', 0, None)
+    # True 2
+
+    publisher.stop()
+    bus1.stop()
+    bus2.stop()
+    os.rmdir("shared_file.txt.bus")
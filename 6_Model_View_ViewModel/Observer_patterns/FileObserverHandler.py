@@ -1,4 +1,5 @@
 import os
+import threading
 import time
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
@@ -17,6 +18,77 @@ class FileObserverHandler(FileSystemEventHandler):
             self.notify_function(event)
 
 
+
+class Directory_Event_Handler(FileSystemEventHandler):
+    """ Forwards the events of a directory to the FileObserverHandler of the modified file only """
+
+    def __init__(self):
+        self.file_handlers = {}     # shared_file_abspath : [FileObserverHandler, ...]
+
+    def dispatch(self, event):
+        for file_handler in list(self.file_handlers.get(event.src_path, ())):
+            file_handler.dispatch(event)
+
+
+class File_Observer_Registry:
+    """
+    Single watchdog Observer of the process, with a single watch per directory for all the files observed in it
+
+    The Observer is started with the first watched file and stopped after the last one is unwatched.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.observer = None
+        self.directories = {}   # directory : (Directory_Event_Handler, watch)
+
+    def watch(self, file_observer_handler: FileObserverHandler) -> None:
+        directory = os.path.dirname(file_observer_handler.shared_file_abspath)
+        with self.lock:
+            if self.observer is None:
+                self.observer = Observer()
+                self.observer.daemon = True
+                self.observer.start()
+            if directory not in self.directories:
+                directory_handler = Directory_Event_Handler()
+                watch = self.observer.schedule(directory_handler, path=directory, recursive=False)
+                self.directories[directory] = (directory_handler, watch)
+            file_handlers = self.directories[directory][0].file_handlers
+            file_handlers.setdefault(file_observer_handler.shared_file_abspath, []).append(file_observer_handler)
+
+    def unwatch(self, file_observer_handler: FileObserverHandler) -> None:
+        directory = os.path.dirname(file_observer_handler.shared_file_abspath)
+        with self.lock:
+            if directory not in self.directories:
+                return
+            directory_handler, watch = self.directories[directory]
+            file_handlers = directory_handler.file_handlers.get(file_observer_handler.shared_file_abspath, [])
+            if file_observer_handler in file_handlers:
+                file_handlers.remove(file_observer_handler)
+            if not file_handlers:
+                directory_handler.file_handlers.pop(file_observer_handler.shared_file_abspath, None)
+            if directory_handler.file_handlers:
+                return
+            self.observer.unschedule(watch)
+            del self.directories[directory]
+            if not self.directories:
+                observer, self.observer = self.observer, None
+                observer.stop()
+                if threading.current_thread() is not observer:  # not unwatched by one of its notifications
+                    observer.join()
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {"observers": 0 if self.observer is None else 1,
+                    "watched_directories": len(self.directories),
+                    "watched_files": sum(len(directory_handler.file_handlers)
+                                         for directory_handler, _ in self.directories.values())}
+
+
+# Shared by all the models of the process
+file_observer_registry = File_Observer_Registry()
+
+
 if __name__ == "__main__":
     shared_file = os.path.abspath("shared_file.txt")
 
@@ -1,37 +1,92 @@
 # https://en.wikipedia.org/wiki/Observer_pattern#Python
-import atexit
+import weakref
+from collections import UserList
 from difflib import Differ
 
 
 class Observable:
+    """
+    Keeps a list of observers to notify on modification
+
+    Bound methods are held by weak references (weakref.WeakMethod) so a view, a view model or a controller can be
+    garbage collected without unregistering first, its dead reference is then dropped during the next dispatch.
+    _on_observer_dropped is called when such an owner is garbage collected.
+    Other callables (functions, lambdas) have no owner to wait for and are held by strong references.
+
+    __slots__ avoids a __dict__ for each ObservableProperty of an ObservableList (subclasses without __slots__,
+    like the models, still get one)
+    """
+    __slots__ = ("_observers", "_unbind", "__weakref__")
 
     def __init__(self):
         self._observers = []
         self._unbind = None
 
+    @staticmethod
+    def _observer_ref(observer: callable, on_dropped: callable = None):
+        """ Return a callable which gives back the observer, or None once it has been garbage collected """
+        if hasattr(observer, "__self__") and hasattr(observer, "__func__"):
+            return weakref.WeakMethod(observer, on_dropped)
+        return lambda: observer
+
+    def _index_of(self, observer: callable):
+        for index, observer_ref in enumerate(self._observers):
+            if observer_ref() == observer:
+                return index
+        return None
+
     def add_observer(self, observer: callable):
-        if observer not in self._observers:
-            self._observers.append(observer)
+        if self._index_of(observer) is None:
+            # The callback only holds a weak reference to the observable, which does not outlive its observers
+            observable_ref = weakref.ref(self)
+
+            def on_dropped(_observer_ref):
+                observable = observable_ref()
+                if observable is not None:
+                    observable._on_observer_dropped()
+
+            self._observers.append(self._observer_ref(observer, on_dropped))
+
+    def _on_observer_dropped(self):
+        """ Can be overridden to react when the owner of an observer has been garbage collected """
+        pass
 
     def remove_observer(self, observer: callable):
-        if observer in self._observers:
-            self._observers.remove(observer)
+        index = self._index_of(observer)
+        if index is not None:
+            del self._observers[index]
+
+    def count_observers(self) -> int:
+        """ Return the number of observers still alive """
+        return sum(1 for observer_ref in self._observers if observer_ref() is not None)
 
     def notify_observers(self, *args, **kwargs):
-        for observer in self._observers:
-            observer(*args, **kwargs)
+        # Iterates over a copy as an observer may add or remove observers when notified
+        for observer_ref in list(self._observers):
+            observer = observer_ref()
+            if observer is None:
+                # The owner of the observer has been garbage collected
+                if observer_ref in self._observers:
+                    self._observers.remove(observer_ref)
+            else:
+                observer(*args, **kwargs)
 
     def bind(self, observer: callable):
         self.add_observer(observer)
+        # Only keeps a weak reference to a bound method, so the unbind function does not keep its owner alive
+        observer_ref = self._observer_ref(observer)
 
         def unbind_function():
-            self.remove_observer(observer)
+            bound_observer = observer_ref()
+            if bound_observer is not None:
+                self.remove_observer(bound_observer)
 
         self._unbind = unbind_function
         return self
 
 
 class ObservableProperty(Observable):
+    __slots__ = ("_value",)
 
     def __init__(self, value=None):
         super().__init__()
@@ -54,12 +109,17 @@ class ObservableProperty(Observable):
             self._unbind()  # ObservableProperty unbind
 
 
-class ObservableList(Observable, list):
+class ObservableList(Observable, UserList):
+    """ List of ObservableProperty (UserList instead of list, whose instance layout is not compatible with __slots__) """
 
     def __init__(self, value_list=None):
         super().__init__()
-        for i, value in enumerate(value_list):
+        UserList.__init__(self)  # Observable.__init__ does not chain to the list initialization
+        for value in value_list or []:
             self.append(value)
+        # ('insert' or 'delete', index) applied by the last update of the list size, in order,
+        # so the list binds can follow the modifications instead of reloading the whole list
+        self.changes = []
 
     def append(self, _object) -> None:
         if isinstance(_object, ObservableProperty):
@@ -82,12 +142,14 @@ class ObservableList(Observable, list):
             # If the list has a different size, update the whole list
             # and notify the list binds for scrollbars and screen cleaning
             diff = list(Differ().compare([item.get() for item in self], value_list))
+            self.changes = []
             index = 0
             for step in diff:
                 if step[:2] == '- ':
                     # print(f"ObservableList update : unbind_property and del : [{index}]")
                     self[index].unbind_property()
                     del self[index]
+                    self.changes.append(('delete', index))
                 elif step[:2] == '+ ':
                     def type_param(given_type, param_str):
                         """ Build a value from a given type and a string (including tuples)
@@ -115,6 +177,7 @@ class ObservableList(Observable, list):
                     value = type_param(type(value_list[index]), step[2:])
                     # print(f"ObservableList update : insert : [{index}]={value}")
                     self.insert(index, value)
+                    self.changes.append(('insert', index))
                     index += 1
                 elif step[:2] != '? ':
                     index += 1
@@ -131,13 +194,111 @@ class ObservableList(Observable, list):
         return repr([item.get() for item in self])
 
 
+class CompactObservableList(Observable):
+    """
+    Array-backed observable list storing the raw values contiguously, without an ObservableProperty per item
+
+    The item modifications are dispatched by a single function to :
+    - the item observers bound with 'bind_items', called with the index of the modified item
+    - the observers subscribed to one index with 'add_index_observer' (only the subscribed indexes use memory)
+    The list observers bound with 'bind_list' are notified when the size of the list changes.
+
+    As 'update' replaces the whole list, the position of an item is not known after a change of size : the index
+    subscriptions are then notified a last time and cleared (instead of being shifted), so a subscriber is never
+    notified for another item than the one it subscribed to and needs to subscribe again to the new index.
+    """
+    __slots__ = ("_values", "_item_observers", "_index_observers", "_unbind_items")
+
+    def __init__(self, value_list=None):
+        super().__init__()
+        self._values = list(value_list or [])
+        self._item_observers = Observable()
+        self._index_observers = {}  # dict[index] = Observable
+        self._unbind_items = None
+
+    def __len__(self):
+        return len(self._values)
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __getitem__(self, index):
+        return self._values[index]
+
+    def __setitem__(self, index, value):
+        self.set(index, value)
+
+    def get(self, index):
+        return self._values[index]
+
+    def set(self, index, value):
+        if self._values[index] != value:
+            self._values[index] = value
+            self._dispatch(index)  # on modified item
+
+    def _dispatch(self, index):
+        """ Single dispatcher for all the item modifications """
+        self._item_observers.notify_observers(index)
+        index_observers = self._index_observers.get(index)
+        if index_observers is not None:
+            index_observers.notify_observers()
+
+    def add_index_observer(self, index, observer: callable):
+        self._index_observers.setdefault(index, Observable()).add_observer(observer)
+
+    def remove_index_observer(self, index, observer: callable):
+        index_observers = self._index_observers.get(index)
+        if index_observers is not None:
+            index_observers.remove_observer(observer)
+            if index_observers.count_observers() == 0:
+                del self._index_observers[index]
+
+    def update(self, value_list=None):
+        value_list = value_list or []
+        if len(self._values) == len(value_list):
+            # If the list has the same size, only set the values and dispatch the modified ones
+            for index, value in enumerate(value_list):
+                self.set(index, value)
+        else:
+            # If the list has a different size, replace the values at once and notify the list binds,
+            # the index subscriptions may now refer to other items : they are notified and cleared
+            self._values = list(value_list)
+            index_observers_list, self._index_observers = list(self._index_observers.values()), {}
+            for index_observers in index_observers_list:
+                index_observers.notify_observers()
+            self.notify_observers()  # on modified list
+
+    def bind_list(self, observer):
+        return self.bind(observer)  # CompactObservableList bind
+
+    def unbind_list(self):
+        if self._unbind is not None:
+            self._unbind()  # CompactObservableList unbind
+
+    def bind_items(self, observer):
+        """ Bind a single observer called with the index of each modified item """
+        self._item_observers.bind(observer)
+        self._unbind_items = self._item_observers._unbind
+        return self
+
+    def unbind_items(self):
+        if self._unbind_items is not None:
+            self._unbind_items()
+
+    def __repr__(self):
+        return repr(self._values)
+
+
 class ObserverObject:
     def __init__(self, name, observable):
         self.name = name
         self.observable = observable
         self.observable.add_observer(self.notify)
         print(self.name, "Add self.notify to observer list of", self.observable.__class__.__name__)
-        atexit.register(self.on_closing)
+        # Reports the end of the observation once garbage collected (or at exit) without keeping self alive,
+        # the Observable drops the dead self.notify by itself
+        weakref.finalize(self, print, self.name, "Removed from observer list of",
+                         self.observable.__class__.__name__)
 
     def on_closing(self):
         self.observable.remove_observer(self.notify)
@@ -152,6 +313,12 @@ if __name__ == "__main__":
     object_observer1 = ObserverObject("object_observer1", subject)
     object_observer2 = ObserverObject("object_observer2", subject)
     subject.notify_observers("notification", kw="test")
+    print(f"{subject.count_observers()=}")  # 2
+
+    # Deleting an observer object is enough to stop its notifications
+    del object_observer2
+    subject.notify_observers("notification", kw="test")
+    print(f"{subject.count_observers()=}")  # 1
 
     ### Output :
     # <__main__.ObserverObject object at 0x00000165AC0B9490> Got ('notification',) {'kw': 'test'} From <__main__.Observable object at 0x00000165AC0B9410>
@@ -209,3 +376,15 @@ if __name__ == "__main__":
 
     print(f"{collect.update(['test1', 'modified', 'test3'])=}")
     print(f"{collect=}\n")
+
+    # Memory used by the items of the two kinds of observable lists
+    import tracemalloc
+
+    tuple_list = [(f"Task {i}", str(i % 5 + 1)) for i in range(100_000)]
+    for list_type in (ObservableList, CompactObservableList):
+        tracemalloc.start()
+        observable_list = list_type(tuple_list)
+        memory_size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{list_type.__name__} of {len(observable_list)} tuples : {memory_size / 1024 / 1024:.1f} MB")
+        del observable_list
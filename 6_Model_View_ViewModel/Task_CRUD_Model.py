@@ -1,10 +1,17 @@
+import importlib
+import os
 from datetime import datetime
 
-from Generic_Models.Generic_CRUD_Model import Generic_CRUD_Model
-from Generic_Models.Generic_CSV_CRUD_Model import Generic_CSV_CRUD_Model
-from Generic_Models.Generic_JSON_CRUD_Model import Generic_JSON_CRUD_Model, Json_Object_Meta
-from Generic_Models.Generic_XML_CRUD_Model import Generic_XML_CRUD_Model
-from Generic_Models.Generic_SQLITE3_CRUD_Model import Generic_SQLITE3_CRUD_Model
+from Generic_Models.Json_Object_Meta import Json_Object_Meta
+
+# Generic_CRUD_Model inherited by Task_CRUD_Model : Generic_CRUD_Model, Generic_CSV_CRUD_Model,
+# Generic_JSON_CRUD_Model, Generic_XML_CRUD_Model or Generic_SQLITE3_CRUD_Model (environment variable TASK_BACKEND)
+TASK_BACKEND = os.environ.get("TASK_BACKEND", "Generic_SQLITE3_CRUD_Model")
+
+
+def import_backend(backend_name: str = TASK_BACKEND) -> type:
+    """ Imports only the module of this backend, to keep the startup short """
+    return getattr(importlib.import_module(f"Generic_Models.{backend_name}"), backend_name)
 
 
 class Task(metaclass=Json_Object_Meta):     # needed for Generic_JSON_CRUD_Model
@@ -26,9 +33,9 @@ class Task(metaclass=Json_Object_Meta):     # needed for Generic_JSON_CRUD_Model
         return f"{self.read_format()}"
 
 
-class Task_CRUD_Model(Generic_SQLITE3_CRUD_Model):
+class Task_CRUD_Model(import_backend()):
     """
-    Create a complete CRUD Model for storing 'Task' Object in :
+    Create a complete CRUD Model for storing 'Task' Object in (depending on TASK_BACKEND) :
     - a CSV File named 'Task.csv' if it inherits from 'Generic_CSV_CRUD_Model'
     - a JSON File named 'Task.json' if it inherits from 'Generic_JSON_CRUD_Model'
     - an XML File named 'Task.xml' if it inherits from 'Generic_XML_CRUD_Model'
@@ -42,13 +49,92 @@ class Task_CRUD_Model(Generic_SQLITE3_CRUD_Model):
     def create(self, title: str, priority: int):
         super().create(title, priority, datetime.now())
 
-    def update(self, list_idx: int, title: str, priority: int):
+    def update(self, list_idx: int, title: str, priority: int, expected_generation: int = None):
         # Includes the date and time of modification
-        super().update(list_idx, title, priority, datetime.now())
+        super().update(list_idx, title, priority, datetime.now(), expected_generation=expected_generation)
+
+
+TASK_SOCKET = "Task.sock"   # socket of the server started with 'python Task_CRUD_Model.py --serve'
+
+
+def Task_CRUD_Model_Client(notify_function: callable = None, socket_path: str = TASK_SOCKET):
+    """
+    Replaces Task_CRUD_Model in a process using the Task_CRUD_Model of the server instead of its own copy,
+    'notify_function' is called when the tasks are modified by another process
+    """
+    # imported here so that the processes which do not share the model do not load the server module
+    from Generic_Models.Generic_CRUD_Model_Server import Generic_CRUD_Model_Client
+
+    tasks = Generic_CRUD_Model_Client(socket_path)
+    if notify_function is not None:
+        tasks.add_observer(notify_function)
+    return tasks
+
+
+def serve_tasks(socket_path: str = TASK_SOCKET):
+    """ Owns the Task_CRUD_Model shared by the Task_CRUD_Model_Client of the other processes """
+    from Generic_Models.Generic_CRUD_Model_Server import Generic_CRUD_Model_Server
+
+    server = None
+    # the modifications of the file by the processes which do not use the server are forwarded too
+    tasks = Task_CRUD_Model(lambda *args, **kwargs: server.notify_subscribers())
+    server = Generic_CRUD_Model_Server(tasks, socket_path)
+    print(f"Serving {tasks.filename} on {server.socket_path} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.close()
+
+
+def benchmark_durability(operation_count: int = 200):
+    """
+    Prints the modifications per second of each backend at each durability level (in a temporary directory),
+    'none' and 'flush' only differ for SQLite since the other backends close (and so flush) the file at each writing
+    """
+    import tempfile
+    import time
+
+    from Generic_Models.Generic_CRUD_Model import Generic_CRUD_Model
+    from Generic_Models.Generic_CSV_CRUD_Model import Generic_CSV_CRUD_Model
+    from Generic_Models.Generic_JSON_CRUD_Model import Generic_JSON_CRUD_Model
+    from Generic_Models.Generic_XML_CRUD_Model import Generic_XML_CRUD_Model
+    from Generic_Models.Generic_SQLITE3_CRUD_Model import Generic_SQLITE3_CRUD_Model
+
+    current_directory = os.getcwd()
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        os.chdir(temporary_directory)   # the files are created in the current directory
+        try:
+            print(f"{'ops/sec':<28}" + "".join(f"{str(level):>12}" for level in Generic_CRUD_Model.DURABILITY_LEVELS))
+            for model_class in (Generic_CSV_CRUD_Model, Generic_JSON_CRUD_Model,
+                                Generic_XML_CRUD_Model, Generic_SQLITE3_CRUD_Model):
+                results = []
+                for durability in Generic_CRUD_Model.DURABILITY_LEVELS:
+                    model = model_class(Task)
+                    model.set_durability(durability)
+                    start = time.perf_counter()
+                    for i in range(operation_count):
+                        model.create(f"Task {i}", i % 5 + 1, datetime.now())
+                    results.append(operation_count / (time.perf_counter() - start))
+                    filename = model.filename
+                    del model
+                    os.remove(filename)     # starts from an empty file for the next level
+                print(f"{model_class.__name__:<28}" + "".join(f"{result:>12.0f}" for result in results))
+        finally:
+            os.chdir(current_directory)
 
 
 if __name__ == "__main__":
 
+    import sys
+
+    if "--durability-benchmark" in sys.argv:
+        benchmark_durability()
+        sys.exit()
+
+    if "--serve" in sys.argv:
+        serve_tasks()
+        sys.exit()
+
     class Model_User:
         def __init__(self, model, notify_function: callable):
             self.model = model
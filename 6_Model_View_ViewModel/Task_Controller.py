@@ -1,6 +1,139 @@
-import atexit
-import traceback
-from datetime import datetime
+import itertools
+import threading
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+# The handle of a task given to the view models for the updates and the deletions is its 'task id' : an int given by
+# the projection to each task, kept while the other tasks are created, updated or deleted (see follow_task_ids)
+
+
+class Task_Conflict_Error(ValueError):
+    """ Raised when the task of a handle is no longer in the model, so the modification is not written """
+
+
+class Task_Projection:
+    """
+    Read projection of a task model shared by all the controllers of this model
+
+    The formatted tasks are computed once per generation of the model, then the same immutable snapshot
+    (a tuple of tuples) is returned to every view model until the next modification.
+    Each task has a stable id (its handle), found again in the next snapshots through a dict.
+    """
+    _projections = weakref.WeakKeyDictionary()   # dict[task_model] = Task_Projection
+
+    @classmethod
+    def of(cls, task_model):
+        projection = cls._projections.get(task_model)
+        if projection is None:
+            projection = cls._projections[task_model] = cls(task_model)
+        return projection
+
+    def __init__(self, task_model):
+        self.task_model_ref = weakref.ref(task_model)   # the model is the key of the shared projections
+        self.generation = None
+        self.snapshot = ()
+        self.handles = ()   # id of each task of the snapshot
+        self.index_of = {}  # dict[task_id] = index of the task in the snapshot
+        self.version = None     # version of the model (see changes) of the task ids
+        self.next_task_id = itertools.count()
+        self.computed_count = 0     # number of snapshots formatted since the creation
+        # the model can be notified by the thread of the file observer and modified by the thread of the writer
+        self.lock = threading.RLock()
+
+    @staticmethod
+    def format_task(task):
+        return task[0], str(task[1]), task[2].strftime("%Y-%m-%d %H:%M:%S.%f")
+
+    def read_tasks(self):
+        """ Returns the snapshot of the formatted tasks and the handles of these tasks (in the same order) """
+        task_model = self.task_model_ref()
+        with self.lock:
+            generation = task_model.current_generation()
+            if generation != self.generation:
+                rows = task_model.read(reload=False)
+                self.snapshot = tuple(self.format_task(task) for task in rows)
+                self.handles = self.follow_task_ids(task_model, len(rows))
+                self.index_of = {task_id: index for index, task_id in enumerate(self.handles)}
+                self.generation = generation
+                self.computed_count += 1
+            return self.snapshot, self.handles
+
+    def follow_task_ids(self, task_model, task_count):
+        """
+        Applies the changes of the model since the previous snapshot to the ids of its tasks : a created task gets
+        a new id, an updated one keeps its id. All the tasks get new ids when the changes are not known (first
+        snapshot, changes no longer in the journal, model without journal).
+        """
+        task_ids = list(self.handles)
+        changes = task_model.changes(-1 if self.version is None else self.version) \
+            if hasattr(task_model, "changes") else None
+        if changes:
+            self.version = changes[-1].version
+            if hasattr(changes[0], "operation"):
+                for change in changes:
+                    if change.operation == "create":
+                        task_ids.insert(change.list_idx, next(self.next_task_id))
+                    elif change.operation == "delete":
+                        del task_ids[change.list_idx]
+            else:
+                task_ids = None     # Model_Reset
+        if changes is None or task_ids is None or len(task_ids) != task_count:
+            task_ids = [next(self.next_task_id) for _ in range(task_count)]
+        return tuple(task_ids)
+
+    def index_of_task(self, task_id) -> int:
+        """ Returns the index of the task in the model, or raises a Task_Conflict_Error if it is no longer in it """
+        with self.lock:
+            self.read_tasks()
+            index = self.index_of.get(task_id)
+        if index is None:
+            raise Task_Conflict_Error(f"The task {task_id} is no longer in the model")
+        return index
+
+
+class Task_Writer:
+    """
+    Single writer of a task model : the creations, updates and deletions are queued and executed in order
+    by one background thread, so the UI thread does not wait for the file/db to be read and written again
+
+    Each write returns a Future. The model is written without the lock of the projection, which is only taken to
+    compute the next snapshot, so the views are not blocked by the file/db meanwhile. The observers notified by
+    the write are called once it is done (see notify).
+    """
+    _writers = weakref.WeakKeyDictionary()   # dict[task_model] = Task_Writer
+
+    @classmethod
+    def of(cls, task_model):
+        writer = cls._writers.get(task_model)
+        if writer is None:
+            writer = cls._writers[task_model] = cls(Task_Projection.of(task_model))
+        return writer
+
+    def __init__(self, projection):
+        self.projection = projection
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=self.__class__.__name__)
+        self.local = threading.local()  # notifications of the write in progress of the writer thread
+
+    def submit(self, write: callable, *args):
+        return self.executor.submit(self._write, write, *args)
+
+    def _write(self, write, *args):
+        self.local.notifications = []
+        try:
+            return write(*args)
+        finally:
+            notifications, self.local.notifications = self.local.notifications, None
+            for observer, args, kwargs in notifications:
+                observer(*args, **kwargs)
+
+    def notify(self, observer: callable, *args, **kwargs):
+        """ Notifies the observer, after the write if called by a write (so its snapshot is computed before) """
+        notifications = getattr(self.local, "notifications", None)
+        if notifications is None:
+            observer(*args, **kwargs)
+        else:
+            notifications.append((observer, args, kwargs))
 
 
 class Task_Controller:
@@ -8,48 +141,85 @@ class Task_Controller:
     def __init__(self, task_model, observer: callable):
         super().__init__()
         self.tasks = task_model
+        self.projection = Task_Projection.of(task_model)
+        self.writer = Task_Writer.of(task_model)
         self.observer = observer
-        self.tasks.add_observer(self.observer)
-        atexit.register(self.on_closing)
+        # The model only keeps a weak reference to the controller, so no need to unregister it at exit:
+        # it is dropped once its owner (the view model) is garbage collected
+        self.tasks.add_observer(self.on_model_modified)
 
     def on_closing(self):
-        self.tasks.remove_observer(self.observer)
+        """ Stops the notifications before the owner of the observer is garbage collected """
+        self.tasks.remove_observer(self.on_model_modified)
 
-    def _get_read_index(self, selected_item):
-        try:
-            selected_tuple = (
-                selected_item[0],
-                int(selected_item[1]),
-                datetime.strptime(selected_item[2], '%Y-%m-%d %H:%M:%S.%f'),
-            )
-        except (IndexError, ValueError):
-            print("Error between selected item and model", traceback.format_exc())
-        else:
-            for idx, read_tuple in enumerate(self.tasks.read()):
-                if read_tuple == selected_tuple:
-                    return idx
-        return None
+    def on_model_modified(self, *args, **kwargs):
+        # a modification of the writer is notified once it is done for the refresh of the observer
+        self.writer.notify(self.observer, *args, **kwargs)
+
+    def _get_read_index(self, task_handle):
+        if isinstance(task_handle, Future):
+            # Future of a creation or an update not written when the view model read it : the single writer has done
+            # it since, so its result is the handle of the task (or its exception, which fails this modification too)
+            task_handle = task_handle.result()
+        if task_handle is None:
+            raise ValueError("No handle for this task : pass the future returned by create_task until it is written")
+        # The task may have moved since the handle was read, or have been removed
+        return self.projection.index_of_task(task_handle)
+
+    # The modifications are executed by the writer of the model and return a Future, which gives the handle
+    # of the created or updated task (None for a deletion), or raises a Task_Conflict_Error if the task is gone
 
     # replace add_button
     def create_task(self, task_name, task_priority):
+        """ The returned Future can be used as the handle of the task by update_task and delete_task """
+        return self.writer.submit(self._create_task, task_name, task_priority)
+
+    def _create_task(self, task_name, task_priority):
         self.tasks.create(task_name, int(task_priority))
+        return self.projection.read_tasks()[1][-1]   # the created task is the last one
 
     # replace update_button / update_label / update_priority
-    def update_task(self, selected_item, new_task_name, new_task_priority):
-        read_index = self._get_read_index(selected_item)
-        if read_index is not None:
-            self.tasks.update(read_index, new_task_name, int(new_task_priority))
+    def update_task(self, task_handle, new_task_name, new_task_priority):
+        """ The returned Future replaces the handle of the task (whose values are modified) like for create_task """
+        return self.writer.submit(self._update_task, task_handle, new_task_name, new_task_priority)
+
+    def _update_task(self, task_handle, new_task_name, new_task_priority):
+        read_index = self._get_read_index(task_handle)
+        self.tasks.update(read_index, new_task_name, int(new_task_priority))
+        return self.projection.read_tasks()[1][read_index]
 
     # replace delete_button / delete_label
-    def delete_task(self, selected_item):
-        read_index = self._get_read_index(selected_item)
-        if read_index is not None:
-            self.tasks.delete(read_index)
+    def delete_task(self, task_handle):
+        return self.writer.submit(self._delete_task, task_handle)
+
+    def _delete_task(self, task_handle):
+        self.tasks.delete(self._get_read_index(task_handle))
 
     # replace get_task_list
     def read_tasks(self):
-        return [(task[0], str(task[1]), task[2].strftime("%Y-%m-%d %H:%M:%S.%f")) for task in self.tasks.read()]
+        """ Returns the snapshot of the tasks shared with the other controllers (must not be modified) """
+        return self.projection.read_tasks()[0]
 
+    def read_tasks_with_handles(self):
+        """ Returns the snapshot of the tasks and their handles to pass to update_task and delete_task """
+        return self.projection.read_tasks()
+
+    def read_task_changes(self, since):
+        """
+        Returns (version, changes) : the ('create' | 'update' | 'delete', index, task) made since the version
+        'since' (None the first time), or a single ('reset', None, tasks) with all the tasks when they are not known
+        (changes no longer in the journal of the model, or a model without journal)
+        """
+        if not hasattr(self.tasks, "changes"):
+            return None, [("reset", None, self.read_tasks())]
+        changes = self.tasks.changes(-1 if since is None else since)
+        if not changes:
+            return since, []
+        if not hasattr(changes[0], "operation"):    # Model_Reset (version, all the tasks)
+            return changes[0].version, [("reset", None, tuple(map(self.projection.format_task, changes[0].values)))]
+        return changes[-1].version, [(change.operation, change.list_idx,
+                                      None if change.values is None else self.projection.format_task(change.values))
+                                     for change in changes]
 
 
 if __name__ == "__main__":
@@ -78,40 +248,79 @@ if __name__ == "__main__":
     # View notified for a refresh
 
     # Create a first task
-    controller.create_task("A first task", "3")  # add_button("A first task", "3")
+    controller.create_task("A first task", "3").result()  # add_button("A first task", "3")
     task_list = controller.read_tasks()  # get_task_list()
     print(task_list, end='\n\n')
     # Output:
-    # [('A first task', '3', '2023-09-19 16:43:55.647454')]
+    # (('A first task', '3', '2023-09-19 16:43:55.647454'),)
     # View notified for a refresh
 
     # Create a second task
-    controller.create_task("A second task", "6") # add_button("A second task", "6")
+    controller.create_task("A second task", "6").result() # add_button("A second task", "6")
     task_list = controller.read_tasks()      # get_task_list()
     print(task_list, end='\n\n')
     # Output:
-    # [('A first task', '3', '2023-09-19 16:43:55.647454'),
-    # ('A second task', '6', '2023-09-19 16:43:55.670727')]
+    # (('A first task', '3', '2023-09-19 16:43:55.647454'),
+    # ('A second task', '6', '2023-09-19 16:43:55.670727'))
     # View notified for a refresh
 
     # Update the second task
-    item_tuple = task_list[1]
-    controller.update_task(item_tuple, "A modified task", 4)  # update_button(item_tuple, "A modified task", 4)
+    task_list, task_handles = controller.read_tasks_with_handles()
+    modified_task_handle = controller.update_task(task_handles[1], "A modified task", 4)  # update_button(...)
+    modified_task_handle.result()
     task_list = controller.read_tasks()  # get_task_list()
     print(task_list, end='\n\n')
     # Output:
-    # [('A first task', '3', '2023-09-19 16:43:55.647454'),
-    # ('A modified task', '4', '2023-09-19 16:43:55.681733')]
+    # (('A first task', '3', '2023-09-19 16:43:55.647454'),
+    # ('A modified task', '4', '2023-09-19 16:43:55.681733'))
     # View notified for a refresh
 
-    # Delete the first task
-    item_tuple = task_list[0]
-    controller.delete_task(item_tuple)    # delete_button(item_tuple)
+    # Update it again with the handle given by the first update (the same id, the task is updated in place)
+    controller.update_task(modified_task_handle, "A task modified twice", 4).result()
     task_list = controller.read_tasks()  # get_task_list()
     print(task_list, end='\n\n')
     # Output:
-    # [('A modified task', '4', '2023-09-19 16:43:55.681733')]
+    # (('A first task', '3', '2023-09-19 16:43:55.647454'),
+    # ('A task modified twice', '4', '2023-09-19 16:43:55.692458'))
+    # View notified for a refresh
+
+    # Delete the first task with a handle read before the last modifications (found again from its id)
+    controller.delete_task(task_handles[0]).result()    # delete_button(item_tuple)
+    try:
+        controller.delete_task(task_handles[0]).result()    # already deleted
+    except Task_Conflict_Error as error:
+        print(repr(error))
+    task_list = controller.read_tasks()  # get_task_list()
+    print(task_list, end='\n\n')
+    # Output:
+    # Task_Conflict_Error('The task 0 is no longer in the model')
+    # (('A task modified twice', '4', '2023-09-19 16:43:55.692458'),)
+    # View notified for a refresh
+
+    # The other controller gets the same snapshot without reading the model again
+    print(controller2.read_tasks() is task_list, f"({controller.projection.computed_count} snapshots formatted)")
+    # Output:
+    # True (5 snapshots formatted)
+
+    # The same handles through a client of the model served to the other processes (see serve_tasks)
+    import os
+    import time
+    from Generic_Models.Generic_CRUD_Model_Server import Generic_CRUD_Model_Server
+    from Task_CRUD_Model import Task_CRUD_Model_Client
+
+    server = Generic_CRUD_Model_Server(my_task_model, "Task_Controller.sock")
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    while not os.path.exists(server.socket_path):
+        time.sleep(0.01)
+    client_controller = Task_Controller(Task_CRUD_Model_Client(socket_path=server.socket_path), my_view.notify)
+    created_handle = client_controller.create_task("A client task", "2")
+    updated_handle = client_controller.update_task(created_handle, "A modified client task", "1")
+    print(updated_handle.result() == created_handle.result(), client_controller.read_tasks()[-1][:2], end='\n\n')
+    # Output:
+    # True ('A modified client task', '1')
     # View notified for a refresh
+    client_controller.tasks.close()
+    server.close()
 
     # # Delete the second task
     # item_tuple = (task_list[0][0], str(task_list[0][1]), task_list[0][2].strftime("%Y-%m-%d %H:%M:%S.%f"))
@@ -1,6 +1,9 @@
-from collections import defaultdict
+import bisect
+import heapq
+import threading
+from collections import defaultdict, Counter
 
-from Observer_patterns.Observables import ObservableProperty, ObservableList
+from Observer_patterns.Observables import ObservableProperty, ObservableList, CompactObservableList
 
 from Task_ViewModels_API import Bar_Chart_ViewModel_API
 from Task_ViewModels_API import Two_Rows_ViewModel_API
@@ -10,6 +13,119 @@ from Task_ViewModels_API import Button_List_ViewModel_API
 from Task_Controller import Task_Controller
 
 
+class Refresh_Scheduler:
+    """
+    Coalesces the refresh requests of the view models : a view model notified several times before the next frame
+    is refreshed only once, at most one refresh per 'interval' seconds for each view model
+
+    The refreshes modify the widgets, so they run in the main loop of the GUI : the views install its scheduler with
+    'set_call_later', like 'lambda delay, function: root.after(int(delay * 1000), function)', which is only called
+    from the main loop to check the dirty view models every 'interval'. The notifications of the other threads
+    (writer, file observer) only mark the view models dirty and never wait for the main loop.
+    Without a GUI (scripts, tests), the refreshes are run immediately.
+    """
+
+    def __init__(self, interval: float = 1 / 60, call_later: callable = None):
+        self.interval = interval
+        self.call_later = None
+        self.poll_count = 0     # identifies the last poll started, the previous ones stop
+        self.dirty_refreshes = {}   # used as an ordered set of the refresh methods to call
+        self.flushing = False
+        self.lock = threading.Lock()
+
+        # instrumentation
+        self.requested_count = 0
+        self.refreshed_count = 0
+        self.coalesced_count = 0
+
+        if call_later is not None:
+            self.set_call_later(call_later)
+
+    def set_call_later(self, call_later: callable):
+        """ Called from the main loop of the GUI, replaces the scheduler of a previous main loop (if any) """
+        with self.lock:
+            self.call_later = call_later
+            self.poll_count += 1
+            poll_count = self.poll_count
+        call_later(self.interval, lambda: self.poll(poll_count))
+
+    def poll(self, poll_count: int):
+        with self.lock:
+            if poll_count != self.poll_count:
+                return  # replaced by the scheduler of another main loop
+            call_later = self.call_later
+        self.flush()
+        call_later(self.interval, lambda: self.poll(poll_count))
+
+    def schedule(self, refresh: callable):
+        with self.lock:
+            self.requested_count += 1
+            if refresh in self.dirty_refreshes:
+                self.coalesced_count += 1   # already dirty, refreshed once for both requests
+                return
+            self.dirty_refreshes[refresh] = None
+            if self.call_later is not None or self.flushing:
+                return  # refreshed by the next poll of the main loop, or by the current flush
+        self.flush()
+
+    def flush(self):
+        with self.lock:
+            if self.flushing:
+                return
+            self.flushing = True
+        try:
+            while True:
+                # swapped first : a refresh scheduled by another one is only run after it (next poll with a GUI)
+                with self.lock:
+                    dirty_refreshes, self.dirty_refreshes = list(self.dirty_refreshes), {}
+                for refresh in dirty_refreshes:
+                    refresh()
+                with self.lock:
+                    self.refreshed_count += len(dirty_refreshes)
+                    if self.call_later is not None or not self.dirty_refreshes:
+                        break
+        finally:
+            with self.lock:
+                self.flushing = False
+
+    def stats(self):
+        return {"requested": self.requested_count,
+                "refreshed": self.refreshed_count,
+                "coalesced": self.coalesced_count}
+
+
+# Shared by all the view models so a model modification is refreshed in a single frame,
+# 'refresh_scheduler.set_call_later' is called by the views with the scheduler of their root window
+refresh_scheduler = Refresh_Scheduler()
+
+
+def pending_task_lists(task_list, task_handles, index=None, task=None, future=None):
+    """
+    Returns copies of the task list and of its handles with a modification not written yet :
+    'index' None appends 'task' (create), 'task' None removes the task at 'index' (delete), otherwise it is updated
+    """
+    task_list, task_handles = list(task_list), list(task_handles)
+    if index is None:
+        task_list.append(task)
+        task_handles.append(future)     # the future of the creation resolves the handle once the task is written
+    elif task is None:
+        del task_list[index]
+        del task_handles[index]
+    else:
+        task_list[index] = task
+        task_handles[index] = future    # the previous handle no longer matches the updated task
+    return task_list, task_handles
+
+
+def reconcile_when_done(future, refresh: callable):
+    """ Displays the tasks of the model again once the modification is written (or has failed) """
+    def on_done(done_future):
+        if done_future.exception() is not None:
+            print("Modification not written in the model :", repr(done_future.exception()))
+        refresh_scheduler.schedule(refresh)
+    future.add_done_callback(on_done)
+
+
 class Button_List_ViewModel(Button_List_ViewModel_API):
 
     def __init__(self, task_model):
@@ -18,6 +134,7 @@ class Button_List_ViewModel(Button_List_ViewModel_API):
         # delegate all interactions with the model to the Controller
         self.controller = Task_Controller(task_model, self.notify)
         self.task_list = []
+        self.task_handles = []
 
         # common
         self.label_name = "Title:"
@@ -55,9 +172,18 @@ class Button_List_ViewModel(Button_List_ViewModel_API):
         self.refreshing = False
 
     def update_and_format_task_list(self):
-        self.task_list = self.controller.read_tasks()
+        self.task_list, self.task_handles = self.controller.read_tasks_with_handles()
+        return self.format_task_list()
+
+    def format_task_list(self):
         return [f"{task[0]}, {self.value_name} {task[1]}" for task in self.task_list]
 
+    def apply_optimistically(self, future, index=None, task=None):
+        """ Displays the modification while it is written by the controller """
+        self.task_list, self.task_handles = pending_task_lists(self.task_list, self.task_handles, index, task, future)
+        self.observable_list.update(self.format_task_list())
+        reconcile_when_done(future, self.refresh)
+
     def reset_popup_var(self):
         self.label_var.set(self.label_init)
         self.value_var.set(self.value_init)
@@ -92,20 +218,22 @@ class Button_List_ViewModel(Button_List_ViewModel_API):
 
     def handle_add_button(self):
         if len(self.label_var.get()) > 0:
-            self.controller.create_task(self.label_var.get(), self.value_var.get())
+            future = self.controller.create_task(self.label_var.get(), self.value_var.get())
+            self.apply_optimistically(future, task=(self.label_var.get(), self.value_var.get(), ""))
 
     def handle_update_button(self, item_id):
         if 0 <= item_id < len(self.task_list):
             if len(self.label_var.get()) > 0:
                 # Find the corresponding task in the model and update it
-                selected_task_tuple = self.task_list[item_id]
-                self.controller.update_task(selected_task_tuple, self.label_var.get(), self.value_var.get())
+                future = self.controller.update_task(self.task_handles[item_id],
+                                                     self.label_var.get(), self.value_var.get())
+                self.apply_optimistically(future, item_id, (self.label_var.get(), self.value_var.get(), ""))
 
     def handle_delete_button(self, item_id):
         if 0 <= item_id < len(self.task_list):
-            # Find the corresponding task in the model and update it
-            selected_task_tuple = self.task_list[item_id]
-            self.controller.delete_task(selected_task_tuple)
+            # Find the corresponding task in the model and delete it
+            future = self.controller.delete_task(self.task_handles[item_id])
+            self.apply_optimistically(future, item_id)
 
     def refresh(self):
         self.refreshing = True
@@ -115,7 +243,12 @@ class Button_List_ViewModel(Button_List_ViewModel_API):
     def notify(self, *args, **kwargs):
         """ Called when the file/db is modified by another process and when the data is modified by another view """
         if self.refreshing is False:
-            self.refresh()
+            refresh_scheduler.schedule(self.refresh)    # refreshed once for all the notifications of a frame
+
+    def set_call_later(self, call_later: callable):
+        """ Called by the view with the scheduler of its main loop, where the refreshes are run """
+        refresh_scheduler.set_call_later(call_later)
+
 
 class Two_Columns_ViewModel(Two_Columns_ViewModel_API):
 
@@ -125,6 +258,7 @@ class Two_Columns_ViewModel(Two_Columns_ViewModel_API):
         # delegate all interactions with the model to the Controller
         self.controller = Task_Controller(task_model, self.notify)
         self.task_list = []
+        self.task_handles = []
 
         # common
         self.label_name = "Title:"
@@ -151,9 +285,19 @@ class Two_Columns_ViewModel(Two_Columns_ViewModel_API):
         self.refreshing = False
 
     def update_and_format_task_list(self):
-        self.task_list = self.controller.read_tasks()
+        self.task_list, self.task_handles = self.controller.read_tasks_with_handles()
+        return self.format_task_list()
+
+    def format_task_list(self):
         return [(str(task[0]), str(task[1])) for task in self.task_list]   # tree 2 colonnes
 
+    def apply_optimistically(self, future, index=None, task=None):
+        """ Displays the modification while it is written by the controller """
+        self.task_list, self.task_handles = pending_task_lists(self.task_list, self.task_handles, index, task, future)
+        self.label_value_tuple_list.update(self.format_task_list())
+        self.clear_input_fields()
+        reconcile_when_done(future, self.refresh)
+
     def on_selected_items(self):
         if len(self.selected_item_dict) == 1:
             self.on_unique_selection()
@@ -182,20 +326,23 @@ class Two_Columns_ViewModel(Two_Columns_ViewModel_API):
 
     def handle_add_button(self):
         if len(self.label_var.get()) > 0:
-            self.controller.create_task(self.label_var.get(), self.value_var.get())
+            future = self.controller.create_task(self.label_var.get(), self.value_var.get())
+            self.apply_optimistically(future, task=(self.label_var.get(), self.value_var.get(), ""))
 
     def handle_update_button(self):
         if len(self.label_var.get()) > 0:
             item_index = list(self.selected_item_dict.keys())[0]
-            self.controller.update_task(
-                self.task_list[item_index],
+            future = self.controller.update_task(
+                self.task_handles[item_index],
                 self.label_var.get(),
                 self.value_var.get()
             )
+            self.apply_optimistically(future, item_index, (self.label_var.get(), self.value_var.get(), ""))
 
     def handle_delete_button(self):
         item_index = list(self.selected_item_dict.keys())[0]
-        self.controller.delete_task(self.task_list[item_index])
+        future = self.controller.delete_task(self.task_handles[item_index])
+        self.apply_optimistically(future, item_index)
 
     def refresh(self):
         self.refreshing = True
@@ -206,7 +353,11 @@ class Two_Columns_ViewModel(Two_Columns_ViewModel_API):
     def notify(self, *args, **kwargs):
         """ Called when the file/db is modified by another process and when the data is modified by another view """
         if self.refreshing is False:
-            self.refresh()
+            refresh_scheduler.schedule(self.refresh)    # refreshed once for all the notifications of a frame
+
+    def set_call_later(self, call_later: callable):
+        """ Called by the view with the scheduler of its main loop, where the refreshes are run """
+        refresh_scheduler.set_call_later(call_later)
 
 
 class Two_Rows_ViewModel(Two_Rows_ViewModel_API):
@@ -217,6 +368,7 @@ class Two_Rows_ViewModel(Two_Rows_ViewModel_API):
         # delegate all interactions with the model to the Controller
         self.controller = Task_Controller(task_model, self.notify)
         self.task_list = []
+        self.task_handles = []
 
         # New Item frame
         self.button_text = "Add"
@@ -239,7 +391,7 @@ class Two_Rows_ViewModel(Two_Rows_ViewModel_API):
         self.refreshing = False
 
     def update_task_list(self):
-        self.task_list = self.controller.read_tasks()
+        self.task_list, self.task_handles = self.controller.read_tasks_with_handles()
 
     def format_label_list(self):
         return [str(task[0]) for task in self.task_list]
@@ -247,6 +399,13 @@ class Two_Rows_ViewModel(Two_Rows_ViewModel_API):
     def format_value_list(self):
         return [str(task[1]) for task in self.task_list]
 
+    def apply_optimistically(self, future, index=None, task=None):
+        """ Displays the modification while it is written by the controller """
+        self.task_list, self.task_handles = pending_task_lists(self.task_list, self.task_handles, index, task, future)
+        self.label_list.update(self.format_label_list())
+        self.value_list.update(self.format_value_list())
+        reconcile_when_done(future, self.refresh)
+
     def reset_var(self):
         self.label_var.set(self.label_init)
         self.value_var.set(self.value_init)
@@ -255,23 +414,25 @@ class Two_Rows_ViewModel(Two_Rows_ViewModel_API):
         new_label = self.label_var.get()
         new_value = self.value_var.get()
         if len(self.label_var.get()) > 0:
-            self.controller.create_task(new_label, new_value)
+            future = self.controller.create_task(new_label, new_value)
+            self.apply_optimistically(future, task=(new_label, new_value, ""))
         self.reset_var()
 
     def on_label_return(self, new_label_on_col, item_id):
         if 0 <= item_id < len(self.task_list):
-            selected_task_tuple = self.task_list[item_id]
-            same_value = selected_task_tuple[1]
+            same_value = self.task_list[item_id][1]
             if len(new_label_on_col) > 0:   # Update
-                self.controller.update_task(selected_task_tuple, new_label_on_col, same_value)
+                future = self.controller.update_task(self.task_handles[item_id], new_label_on_col, same_value)
+                self.apply_optimistically(future, item_id, (new_label_on_col, same_value, ""))
             else:   # Delete
-                self.controller.delete_task(selected_task_tuple)
+                future = self.controller.delete_task(self.task_handles[item_id])
+                self.apply_optimistically(future, item_id)
 
     def on_modified_value(self, new_value_on_col, item_id):
         if 0 <= item_id < len(self.task_list):
-            selected_task_tuple = self.task_list[item_id]
-            same_label = selected_task_tuple[0]
-            self.controller.update_task(selected_task_tuple, same_label, new_value_on_col)
+            same_label = self.task_list[item_id][0]
+            future = self.controller.update_task(self.task_handles[item_id], same_label, new_value_on_col)
+            self.apply_optimistically(future, item_id, (same_label, new_value_on_col, ""))
 
     def refresh(self):
         self.refreshing = True
@@ -283,7 +444,11 @@ class Two_Rows_ViewModel(Two_Rows_ViewModel_API):
     def notify(self, *args, **kwargs):
         """ Called when the file/db is modified by another process and when the data is modified by another view """
         if self.refreshing is False:
-            self.refresh()
+            refresh_scheduler.schedule(self.refresh)    # refreshed once for all the notifications of a frame
+
+    def set_call_later(self, call_later: callable):
+        """ Called by the view with the scheduler of its main loop, where the refreshes are run """
+        refresh_scheduler.set_call_later(call_later)
 
 
 class Bar_Chart_ViewModel(Bar_Chart_ViewModel_API):
@@ -295,19 +460,137 @@ class Bar_Chart_ViewModel(Bar_Chart_ViewModel_API):
         self.controller = Task_Controller(task_model, self.notify)
         self.task_list = []
 
+        # display modes, the number of bars is bounded whatever the number of tasks
+        self.max_bars = 50
+        self.display_modes = ["Tasks", "Count per priority", "Top N by priority", "Tasks per day"]
+        self.display_mode = ObservableProperty(self.display_modes[0])
+        self.display_mode.add_observer(self.refresh)
+
+        # aggregates updated with the changes of the model since the previous version (see update_aggregates)
+        self.aggregate_version = None
+        self.aggregated_tasks = []  # in the order of the model, to know the task updated/deleted at an index
+        self.priority_counts = Counter()
+        self.day_counts = Counter()
+        # (priority, index) of the 'max_bars' tasks with the highest priority, sorted (see top_tasks)
+        self.top_entries = []
+        self.top_rebuild_count = 0
+
         # main frame
-        self.label_value_tuple_list = ObservableList(self.update_and_format_task_list())
         self.value_name = "Priority"
         self.value_options = [1, 2, 3, 4, 5]
         self.reversed_options = True    # like Priority
         self.no_item_message = "No task to display"
+        self.label_value_tuple_list = CompactObservableList(self.update_and_format_task_list())
 
         # reload
         self.refreshing = False
 
     def update_and_format_task_list(self):
         self.task_list = self.controller.read_tasks()
-        return [(str(task[0]), str(task[1])) for task in self.task_list]  # (label, value) as string
+        self.update_aggregates()
+        mode = self.display_mode.get()
+        if mode == "Count per priority":
+            return self.format_priority_counts()
+        elif mode == "Tasks per day":
+            return self.format_day_counts()
+        elif mode == "Top N by priority" or len(self.task_list) > self.max_bars:
+            # too many tasks for one bar each : downsampled to the ones with the highest priority
+            return self.format_task_tuples(self.top_tasks())
+        return self.format_task_tuples(self.task_list)
+
+    def update_aggregates(self):
+        """
+        Applies the tasks created, updated or deleted since the previous version of the model (O(changes)),
+        all the tasks are only counted again after a reset
+        """
+        self.aggregate_version, changes = self.controller.read_task_changes(self.aggregate_version)
+        for operation, index, task in changes:
+            if operation == "reset":
+                self.aggregated_tasks = list(task)     # all the tasks
+                self.priority_counts = Counter(task[1] for task in self.aggregated_tasks)
+                self.day_counts = Counter(task[2][:10] for task in self.aggregated_tasks)
+                self.rebuild_top_entries()
+                continue
+            if operation == "update":
+                self.count_task(self.aggregated_tasks[index], -1)
+                tasks_out_of_top = self.has_tasks_out_of_top()
+                old_entry = self.discard_top_entry(index)
+                self.aggregated_tasks[index] = task
+                if old_entry is not None and tasks_out_of_top and self.top_entry(index) > old_entry:
+                    self.rebuild_top_entries()  # a task out of the top may now be before the updated one
+                else:
+                    self.offer_top_entry(index)
+            elif operation == "delete":
+                tasks_out_of_top = self.has_tasks_out_of_top()
+                self.count_task(self.aggregated_tasks.pop(index), -1)
+                old_entry = self.discard_top_entry(index)
+                self.shift_top_entries(index, -1)
+                if old_entry is not None and tasks_out_of_top:
+                    self.rebuild_top_entries()  # the next task is not known
+            elif operation == "create":
+                self.aggregated_tasks.insert(index, task)
+                self.shift_top_entries(index, 1)
+                self.offer_top_entry(index)
+            if task is not None:
+                self.count_task(task, 1)
+
+    def count_task(self, task, count):
+        for counter, key in ((self.priority_counts, task[1]), (self.day_counts, task[2][:10])):  # 'YYYY-MM-DD'
+            counter[key] += count
+            if counter[key] == 0:
+                del counter[key]    # no empty bar
+
+    def top_entry(self, index):
+        # the highest priority is the lowest value (in the order of the model for the same priority)
+        return int(self.aggregated_tasks[index][1]), index
+
+    def rebuild_top_entries(self):
+        self.top_entries = heapq.nsmallest(self.max_bars, map(self.top_entry, range(len(self.aggregated_tasks))))
+        self.top_rebuild_count += 1
+
+    def has_tasks_out_of_top(self):
+        return len(self.aggregated_tasks) > len(self.top_entries)
+
+    def discard_top_entry(self, index):
+        """ Removes the task at 'index' from the top and returns its entry, or None if it was not in the top """
+        for position, entry in enumerate(self.top_entries):
+            if entry[1] == index:
+                return self.top_entries.pop(position)
+        return None
+
+    def shift_top_entries(self, index, shift):
+        """ Follows the tasks after 'index' moved by a creation (1) or a deletion (-1) """
+        self.top_entries = [(priority, entry_index + shift if entry_index >= index else entry_index)
+                            for priority, entry_index in self.top_entries]
+
+    def offer_top_entry(self, index):
+        entry = self.top_entry(index)
+        if len(self.top_entries) < self.max_bars or entry < self.top_entries[-1]:
+            bisect.insort(self.top_entries, entry)
+            del self.top_entries[self.max_bars:]
+
+    def top_tasks(self):
+        """ Updated with the changes of the model, only rebuilt when a task leaves the top (see update_aggregates) """
+        return [self.aggregated_tasks[index] for _, index in self.top_entries]
+
+    def format_task_tuples(self, task_list):
+        self.value_name = "Priority"
+        self.value_options = [1, 2, 3, 4, 5]
+        self.reversed_options = True
+        return [(str(task[0]), str(task[1])) for task in task_list]  # (label, value) as string
+
+    def format_priority_counts(self):
+        self.value_name = "Tasks"
+        self.value_options = []     # numerical values
+        self.reversed_options = False
+        return [(f"Priority {priority}", str(self.priority_counts[str(priority)])) for priority in range(1, 6)]
+
+    def format_day_counts(self):
+        self.value_name = "Tasks"
+        self.value_options = []     # numerical values
+        self.reversed_options = False
+        last_days = sorted(self.day_counts)[-self.max_bars:]
+        return [(day, str(self.day_counts[day])) for day in last_days]
 
     def refresh(self):
         self.refreshing = True
@@ -317,4 +600,47 @@ class Bar_Chart_ViewModel(Bar_Chart_ViewModel_API):
     def notify(self, *args, **kwargs):
         """ Called when the file/db is modified by another process and when the data is modified by another view """
         if self.refreshing is False:
-            self.refresh()
\ No newline at end of file
+            refresh_scheduler.schedule(self.refresh)    # refreshed once for all the notifications of a frame
+
+    def set_call_later(self, call_later: callable):
+        """ Called by the view with the scheduler of its main loop, where the refreshes are run """
+        refresh_scheduler.set_call_later(call_later)
+
+
+if __name__ == "__main__":
+
+    # Without a GUI, the refreshes are run immediately
+    scheduler = Refresh_Scheduler()
+    refreshes = []
+    scheduler.schedule(lambda: refreshes.append("refreshed"))
+    print(refreshes, scheduler.stats())
+    # Output:
+    # ['refreshed'] {'requested': 1, 'refreshed': 1, 'coalesced': 0}
+
+    # With a GUI, the main loop polls the dirty view models (simulated by a list of the functions to call later)
+    main_loop = []
+    scheduler = Refresh_Scheduler(call_later=lambda delay, function: main_loop.append(function))
+
+    def refresh_first():
+        refreshes.append("first")
+        scheduler.schedule(refresh_second)  # scheduled during a refresh : run by the next poll
+
+    def refresh_second():
+        refreshes.append("second")
+
+    refreshes.clear()
+    scheduler.schedule(refresh_first)   # called by the writer thread : nothing is run until the next poll
+    scheduler.schedule(refresh_first)
+    print(refreshes, scheduler.stats())
+    # Output:
+    # [] {'requested': 2, 'refreshed': 0, 'coalesced': 1}
+
+    main_loop.pop(0)()  # first poll
+    print(refreshes, scheduler.stats())
+    # Output:
+    # ['first'] {'requested': 3, 'refreshed': 1, 'coalesced': 1}
+
+    main_loop.pop(0)()  # next poll
+    print(refreshes, scheduler.stats())
+    # Output:
+    # ['first', 'second'] {'requested': 3, 'refreshed': 2, 'coalesced': 1}
@@ -1,18 +1,12 @@
-import atexit
 import textwrap
-from collections import defaultdict
-import io
+import threading
+from collections import defaultdict, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 import tkinter as tk
+import tkinter.font as tkfont
 
-from PIL import Image, ImageTk
-import matplotlib
-
-# Avoid UserWarning: Starting a Matplotlib GUI outside the main thread will likely fail.
-matplotlib.use('agg')
-from matplotlib import pyplot as plt
-
-from Binding_patterns.TkinterBindings import BoundTk_StringVar, BoundTk_ListVar, BoundTk_TreeView
+from Binding_patterns.TkinterBindings import BoundTk_StringVar, BoundTk_ListVar, BoundTk_VirtualTreeView
 from Binding_patterns.SimpleBindings import Bound_List
 
 
@@ -23,6 +17,9 @@ class Button_List_View(tk.LabelFrame):
 
         # delegate all interactions to the view_model
         self.view_model: Button_List_ViewModel_API = viewmodel
+        # the view model refreshes the view in the main loop of its root window (not from the other threads)
+        self.view_model.set_call_later(
+            lambda delay, function, root=self.winfo_toplevel(): root.after(int(delay * 1000), function))
 
         # Variable for the pop-up windows
         self.label_var = BoundTk_StringVar("label_var", self.view_model.label_var, self)
@@ -32,20 +29,33 @@ class Button_List_View(tk.LabelFrame):
         # main frame
         self.canvas = None
         self.scrollable_table = None
-        self.label_value_tk_list = BoundTk_ListVar(
-            name="bound_tk_list",
-            list_type=BoundTk_StringVar,
+        self.y_scrollbar = None
+
+        # Only the visible rows are displayed, by a pool of row widgets recycled while scrolling
+        self.max_visible_rows = 20
+        self.row_pool = []  # [task_lbl, button1, button2] of each displayed row
+        self.row_texts = []  # text displayed by each row of the pool, to only update the modified ones
+        self.displayed_rows = 0
+        self.first_row = 0  # index in the list of the first displayed row
+
+        self.bound_label_values = Bound_List(
+            name="bound_label_values",
             observable_list=self.view_model.label_value_list,
-            master=self.scrollable_table,
-            on_list_modif=self.update_main_frame
+            on_size_modified=self.update_main_frame,
+            on_item_modified=self.update_row_item
         )
-        atexit.register(self.on_closing)
+        # Unbinds when the widget is destroyed instead of at exit so closed views can be garbage collected
+        self.bind("<Destroy>", self.on_destroy, add="+")
         self.run()
 
+    def on_destroy(self, event):
+        if event.widget is self:
+            self.on_closing()
+
     def on_closing(self):
         self.label_var.unbind_tk_var()
         self.value_var.unbind_tk_var()
-        self.label_value_tk_list.unbind_tk_list()
+        self.bound_label_values.unbind_list()
 
     def run(self):
         ''' All properties and data should be initialized before to launch this method '''
@@ -71,20 +81,20 @@ class Button_List_View(tk.LabelFrame):
         main_frame = tk.Frame(self)
         main_frame.pack(side=tk.RIGHT, fill=tk.BOTH)
 
-        # Create a canvas to hold the table for scrolling
+        # Create a canvas to hold the table of the displayed rows
         self.canvas = tk.Canvas(self, borderwidth=0, highlightthickness=0)
         self.canvas.pack(fill=tk.X)
 
-        # # Define a scrollable table
+        # # Define a table of the displayed rows
         self.scrollable_table = tk.Frame(self.canvas, borderwidth=1, relief=tk.SOLID)
         self.canvas.create_window((0, 0), window=self.scrollable_table, anchor=tk.NW, tags='canvas_window')
 
-        # Create a horizontal scrollbar in the tasks_frame and link it to the canvas for the scrollable table
-        y_scrollbar = tk.Scrollbar(main_frame, orient=tk.VERTICAL, command=self.canvas.yview)
-        y_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        # Create a vertical scrollbar which moves the displayed rows in the whole list
+        self.y_scrollbar = tk.Scrollbar(main_frame, orient=tk.VERTICAL, command=self.on_scrollbar)
+        self.y_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
 
-        # Config the cursor of the scrollbar to be sized/placed according to the width/position of the scrollable_table
-        self.canvas.configure(yscrollcommand=y_scrollbar.set)
+        # Configure grid column weights to make the task_lbl expand with scrollable_table width
+        self.scrollable_table.grid_columnconfigure(0, weight=1)
 
         # Bind the Configure event of the canvas to set it at the height of the scrollable table
         self.canvas.bind("<Configure>", self.set_canvas_height_width)
@@ -98,54 +108,104 @@ class Button_List_View(tk.LabelFrame):
         self.canvas.configure(height=self.scrollable_table.winfo_height())
 
     def on_mousewheel(self, event):
-        # Detect vertical scroll gestures for touchpad and update the canvas's vertical scrolling
+        # Detect vertical scroll gestures for touchpad and move the displayed rows
         if event.delta < 0:
-            self.canvas.yview_scroll(1, tk.UNITS)
+            self.scroll_to(self.first_row + 1)
         elif event.delta > 0:
-            self.canvas.yview_scroll(-1, tk.UNITS)
+            self.scroll_to(self.first_row - 1)
+
+    def on_scrollbar(self, *args):
+        """ 'moveto' fraction or 'scroll' number 'units'/'pages' """
+        if args[0] == tk.MOVETO:
+            self.scroll_to(int(float(args[1]) * len(self.bound_label_values)))
+        elif args[0] == tk.SCROLL:
+            step = self.displayed_rows if args[2] == tk.PAGES else 1
+            self.scroll_to(self.first_row + int(args[1]) * step)
+
+    def scroll_to(self, first_row):
+        first_row = max(0, min(first_row, len(self.bound_label_values) - self.displayed_rows))
+        if first_row != self.first_row:
+            self.first_row = first_row
+            self.display_rows()
+
+    def create_row(self, pool_row):
+        task_lbl = tk.Label(self.scrollable_table, anchor=tk.W, background="white")
+
+        # The index of the item is given by the displayed position when clicked, so the commands never change
+        button1 = tk.Button(
+            master=self.scrollable_table,
+            text=self.view_model.list_button1_text,
+            command=lambda row=pool_row: (
+                self.view_model.list_button1_command(self.first_row + row), self.display_popup())
+        )
+
+        button2 = tk.Button(
+            master=self.scrollable_table,
+            text=self.view_model.list_button2_text,
+            command=lambda row=pool_row: (
+                self.view_model.list_button2_command(self.first_row + row), self.display_popup())
+        )
+        self.row_texts.append(None)
+        return [task_lbl, button1, button2]
 
     def update_main_frame(self):
         # Clear the potential pop_up if any
         if self.popup_window is not None:
             self.popup_window.destroy()
+            self.popup_window = None
+
+        # Keep the first displayed row inside the list
+        self.first_row = max(0, min(self.first_row, len(self.bound_label_values) - self.max_visible_rows))
+        self.display_rows()
+
+    def display_rows(self):
+        rows = min(len(self.bound_label_values), self.max_visible_rows)
+
+        # Only creates the missing rows of the pool, the others are reused
+        while len(self.row_pool) < rows:
+            self.row_pool.append(self.create_row(len(self.row_pool)))
+
+        for pool_row, (task_lbl, button1, button2) in enumerate(self.row_pool):
+            if pool_row < rows:
+                if pool_row >= self.displayed_rows:
+                    task_lbl.grid(row=pool_row, column=0, sticky=tk.EW)
+                    button1.grid(row=pool_row, column=1)
+                    button2.grid(row=pool_row, column=2, padx=(0, 20))  # pad x for scrollbar width
+                self.update_row_text(pool_row)
+            elif pool_row < self.displayed_rows:
+                # Hide the rows which are not needed anymore but keep them for later
+                task_lbl.grid_remove()
+                button1.grid_remove()
+                button2.grid_remove()
+        self.displayed_rows = rows
+
+        # Update the canvas and the scrollbar
+        self.update_scroll_region()
 
-        # Clear the previous widgets inside the tasks_frame if any
-        for widget in self.scrollable_table.winfo_children():
-            widget.destroy()
-
-        for row, tk_item in enumerate(self.label_value_tk_list):
-            task_lbl = tk.Label(self.scrollable_table, textvariable=tk_item, anchor=tk.W, background="white")
-
-            button1 = tk.Button(
-                master=self.scrollable_table,
-                text=self.view_model.list_button1_text,
-                command=lambda item=row: (self.view_model.list_button1_command(item), self.display_popup())
-            )
-
-            button2 = tk.Button(
-                master=self.scrollable_table,
-                text=self.view_model.list_button2_text,
-                command=lambda item=row: (self.view_model.list_button2_command(item), self.display_popup())
-            )
-
-            task_lbl.grid(row=row, column=0, sticky=tk.EW)
-            button1.grid(row=row, column=1)
-            button2.grid(row=row, column=2, padx=(0, 20))  # pad x for scrollbar width
-
-            # Configure grid column weights to make the task_lbl expand with scrollable_table width
-            self.scrollable_table.grid_columnconfigure(0, weight=1)
+    def update_row_text(self, pool_row):
+        text = self.bound_label_values[self.first_row + pool_row]
+        if self.row_texts[pool_row] != text:
+            self.row_pool[pool_row][0].config(text=text)
+            self.row_texts[pool_row] = text
 
-        # Update the scrollable table
-        self.scrollable_table.update()
-        # Update the canvas and scrollable region
-        self.update_scroll_region()
+    def update_row_item(self, index):
+        # Only the displayed rows need to be updated
+        if self.first_row <= index < self.first_row + self.displayed_rows:
+            self.update_row_text(index - self.first_row)
 
     def update_scroll_region(self):
-        # Update the scroll region of the scrolling_canvas to include all the widgets in the tasks list frame
-        self.canvas.update_idletasks()
+        # Set the canvas at the height of the displayed rows
+        self.scrollable_table.update_idletasks()
         self.canvas.configure(scrollregion=self.canvas.bbox(tk.ALL))
         self.set_canvas_height_width(None)
 
+        # Size and place the cursor of the scrollbar according to the displayed rows in the whole list
+        total = len(self.bound_label_values)
+        if total == 0:
+            self.y_scrollbar.set(0.0, 1.0)
+        else:
+            self.y_scrollbar.set(self.first_row / total, (self.first_row + self.displayed_rows) / total)
+
     def display_popup(self):
         self.popup_window = tk.Toplevel(self)
         self.popup_window.title(f"{self.view_model.action_name} Task")
@@ -197,6 +257,9 @@ class Two_Columns_View(tk.LabelFrame):
 
         # delegate all interactions to the view_model
         self.view_model: Two_Columns_ViewModel_API = viewmodel
+        # the view model refreshes the view in the main loop of its root window (not from the other threads)
+        self.view_model.set_call_later(
+            lambda delay, function, root=self.winfo_toplevel(): root.after(int(delay * 1000), function))
 
         # New Item Frame
         self.label_var = BoundTk_StringVar("label_var", self.view_model.label_var, self)
@@ -207,9 +270,14 @@ class Two_Columns_View(tk.LabelFrame):
         self.button_left = None
         self.button_right = None
 
-        atexit.register(self.on_closing)
+        # Unbinds when the widget is destroyed instead of at exit so closed views can be garbage collected
+        self.bind("<Destroy>", self.on_destroy, add="+")
         self.run()
 
+    def on_destroy(self, event):
+        if event.widget is self:
+            self.on_closing()
+
     def on_closing(self):
         self.label_var.unbind_tk_var()
         self.value_var.unbind_tk_var()
@@ -228,7 +296,8 @@ class Two_Columns_View(tk.LabelFrame):
         main_frame = tk.Frame(self)
         main_frame.pack(side=tk.TOP, padx=5, pady=5, fill=tk.BOTH, expand=True)
 
-        self.bound_tk_tree = BoundTk_TreeView(
+        # Only the visible rows are held by the treeview, the others are paged from the list while scrolling
+        self.bound_tk_tree = BoundTk_VirtualTreeView(
             name="bound_tk_tree",
             observable_list=self.view_model.label_value_tuple_list,
             master=main_frame,
@@ -252,8 +321,7 @@ class Two_Columns_View(tk.LabelFrame):
         main_frame.grid_columnconfigure(0, weight=1)  # tree enlarges/reduces its width
         main_frame.grid_columnconfigure(1, weight=0)  # y_scrollbar does not enlarge/reduce its width
 
-        # Bind mousewheel events to capture touchpad gestures
-        self.bound_tk_tree.bind("<MouseWheel>", self.on_mousewheel)
+        # The mousewheel (and the X11 Button-4/5) and the navigation keys are bound by BoundTk_VirtualTreeView
 
         # Bind a function to the select event
         self.bound_tk_tree.bind("<<TreeviewSelect>>", self.on_treeview_selection)
@@ -302,15 +370,7 @@ class Two_Columns_View(tk.LabelFrame):
             state=self.view_model.button_right_state
         )
         if len(self.view_model.selected_item_dict) == 0:
-            for selected_item in self.bound_tk_tree.selection():
-                self.bound_tk_tree.selection_remove(selected_item)
-
-    def on_mousewheel(self, event):
-        # Detect horizontal scroll gestures for touchpad and update the canvas's horizontal scrolling
-        if event.delta < 0:
-            self.bound_tk_tree.yview_scroll(1, tk.UNITS)
-        elif event.delta > 0:
-            self.bound_tk_tree.yview_scroll(-1, tk.UNITS)
+            self.bound_tk_tree.clear_selection()
 
     # def on_treeview_selection(self, event):
     #     # Get the selected item line
@@ -330,9 +390,8 @@ class Two_Columns_View(tk.LabelFrame):
 
     def on_treeview_selection(self, event):
         self.view_model.selected_item_dict.clear()  # dict[index_item] = item_tuple
-        # Get the selected item line
-        for item in self.bound_tk_tree.selection():  # tuple(item,...)
-            self.view_model.selected_item_dict[self.bound_tk_tree.index(item)] = self.bound_tk_tree.item(item, "tags")
+        # Get the selected items, including the ones scrolled out of the virtual treeview
+        self.view_model.selected_item_dict.update(self.bound_tk_tree.selected_items())
         self.view_model.on_selected_items()
         self.update_selection_and_buttons()
 
@@ -344,6 +403,9 @@ class Two_Rows_View(tk.LabelFrame):
 
         # delegate all interactions to the view_model
         self.view_model: Two_Rows_ViewModel_API = viewmodel
+        # the view model refreshes the view in the main loop of its root window (not from the other threads)
+        self.view_model.set_call_later(
+            lambda delay, function, root=self.winfo_toplevel(): root.after(int(delay * 1000), function))
 
         # New Item Frame
         self.label_var = BoundTk_StringVar("label_var", self.view_model.label_var, self)  # entry_var_new
@@ -352,13 +414,20 @@ class Two_Rows_View(tk.LabelFrame):
         # Main Frame
         self.canvas = None
         self.scrollable_table = None
+        self.label_entries = []  # one Entry per column
+        self.value_menus = []  # one OptionMenu per column
+
+        # Entry width (in average characters) of each text, measured once with the font of the entries
+        self.entry_font = None
+        self.char_width = None
+        self.text_widths = {}
 
         self.bound_tk_labels = BoundTk_ListVar(
             name="label_list",
             list_type=BoundTk_StringVar,
             observable_list=self.view_model.label_list,
             master=self.scrollable_table,
-            on_list_modif=self.update_main_frame
+            on_list_modif=self.update_label_columns
         )
 
         self.bound_tk_values = BoundTk_ListVar(
@@ -366,12 +435,17 @@ class Two_Rows_View(tk.LabelFrame):
             list_type=BoundTk_StringVar,
             observable_list=self.view_model.value_list,
             master=self.scrollable_table,
-            on_list_modif=self.update_main_frame
+            on_list_modif=self.update_value_columns
         )
 
-        atexit.register(self.on_closing)
+        # Unbinds when the widget is destroyed instead of at exit so closed views can be garbage collected
+        self.bind("<Destroy>", self.on_destroy, add="+")
         self.run()
 
+    def on_destroy(self, event):
+        if event.widget is self:
+            self.on_closing()
+
     def on_closing(self):
         self.label_var.unbind_tk_var()
         self.value_var.unbind_tk_var()
@@ -452,56 +526,110 @@ class Two_Rows_View(tk.LabelFrame):
         for widget in self.scrollable_table.winfo_children():
             widget.destroy()
 
-        for col in range(len(self.bound_tk_labels)):
-
-            # Set an Entry to see/modify the item label
-            label_entry = tk.Entry(
-                self.scrollable_table,
-                textvariable=self.bound_tk_labels[col],
-                width=len(self.bound_tk_labels[col].get()) + 2,
-                borderwidth=1,
-                relief=tk.RIDGE
-            )
-
-            label_entry.grid(row=0, column=col, sticky=tk.NSEW, padx=2, pady=(2, 0))
-
-            # The width of the entry automatically adjust with the size of the variable (when typing)
-            label_entry.bind(
-                sequence="<KeyRelease>",
-                func=lambda event, ent=label_entry, label=self.bound_tk_labels[col].get():
-                self.adjust_entry_width(ent, label)
-            )
-
-            # Initialize <Return> keypad to validate the item_entry and update it to the model
-            label_entry.bind(
-                sequence="<Return>",
-                func=lambda event, var=self.bound_tk_labels[col], index=col:
-                self.view_model.on_label_return(var.get(), index)
-            )
-
-            if len(self.bound_tk_values) > col:
-                # Set an Option Menu to see/modify the priority
-                value_menu = tk.OptionMenu(
-                    self.scrollable_table,
-                    self.bound_tk_values[col],
-                    *self.view_model.value_options
-                )
-                value_menu.grid(row=1, column=col, sticky=tk.NSEW, pady=(0, 1))
-
-                # Bind an event to the StringVar to trigger when the option is selected
-                self.bound_tk_values[col].trace_add(
-                    mode="write",
-                    callback=lambda *args, var=self.bound_tk_values[col], index=col:
-                    self.view_model.on_modified_value(var.get(), index)
-                )
+        self.label_entries = [self.create_label_entry(col) for col in range(len(self.bound_tk_labels))]
+        self.value_menus = [self.create_value_menu(col) for col in range(len(self.bound_tk_values))]
+        self.grid_columns(self.label_entries, 0, row=0)
+        self.grid_columns(self.value_menus, 0, row=1)
+        self.update_scroll_region()
 
-            self.update_scroll_region()
+    def update_label_columns(self):
+        self.update_columns(self.bound_tk_labels, self.label_entries, self.create_label_entry, row=0)
+
+    def update_value_columns(self):
+        self.update_columns(self.bound_tk_values, self.value_menus, self.create_value_menu, row=1)
+
+    def update_columns(self, bound_tk_list, column_widgets, create_widget, row):
+        """ Only creates/destroys the widgets of the inserted/deleted columns, the others follow their variables """
+        if self.scrollable_table is None:
+            return
+        if bound_tk_list.changes is None:
+            # The whole list has been rebuilt
+            for widget in column_widgets:
+                widget.destroy()
+            column_widgets[:] = [create_widget(col) for col in range(len(bound_tk_list))]
+            first_moved_col = 0
+        else:
+            for operation, col in bound_tk_list.changes:
+                if operation == 'delete':
+                    column_widgets.pop(col).destroy()
+                elif operation == 'insert':
+                    column_widgets.insert(col, create_widget(col))
+            first_moved_col = min((col for _, col in bound_tk_list.changes), default=len(column_widgets))
+        # Only the columns after the first inserted/deleted one change of position
+        self.grid_columns(column_widgets, first_moved_col, row)
+        self.update_scroll_region()
+
+    @staticmethod
+    def grid_columns(column_widgets, first_col, row):
+        # row 0 : label entries, row 1 : value menus
+        grid_options = dict(padx=2, pady=(2, 0)) if row == 0 else dict(pady=(0, 1))
+        for col in range(first_col, len(column_widgets)):
+            column_widgets[col].grid(row=row, column=col, sticky=tk.NSEW, **grid_options)
+
+    def create_label_entry(self, col):
+        label_var = self.bound_tk_labels[col]
+
+        # Set an Entry to see/modify the item label
+        label_entry = tk.Entry(
+            self.scrollable_table,
+            textvariable=label_var,
+            borderwidth=1,
+            relief=tk.RIDGE
+        )
+        label_entry.configure(width=self.text_width(label_var.get()))
+
+        # The width of the entry automatically adjust with the size of the variable (when typing or refreshed)
+        label_var.trace_add(
+            mode="write",
+            callback=lambda *args, ent=label_entry, var=label_var: self.adjust_entry_width(ent, var.get())
+        )
+
+        # Initialize <Return> keypad to validate the item_entry and update it to the model
+        # (the index is searched when needed as it changes with the inserted/deleted columns)
+        label_entry.bind(
+            sequence="<Return>",
+            func=lambda event, var=label_var:
+            self.view_model.on_label_return(var.get(), self.bound_tk_labels.index(var))
+        )
+        return label_entry
+
+    def create_value_menu(self, col):
+        value_var = self.bound_tk_values[col]
+
+        # Set an Option Menu to see/modify the priority
+        value_menu = tk.OptionMenu(
+            self.scrollable_table,
+            value_var,
+            *self.view_model.value_options
+        )
+
+        # Bind an event to the StringVar to trigger when the option is selected
+        value_var.trace_add(
+            mode="write",
+            callback=lambda *args, var=value_var:
+            self.view_model.on_modified_value(var.get(), self.bound_tk_values.index(var))
+        )
+        return value_menu
+
+    def text_width(self, text):
+        """ Width of an entry for this text in average characters, measured once per string """
+        width = self.text_widths.get(text)
+        if width is None:
+            if self.entry_font is None:
+                self.entry_font = tkfont.nametofont("TkTextFont")
+                self.char_width = max(1, self.entry_font.measure("0"))
+            if len(self.text_widths) > 4096:  # bounded cache
+                self.text_widths.clear()
+            width = -(-self.entry_font.measure(text) // self.char_width) + 2
+            self.text_widths[text] = width
+        return width
 
     def adjust_entry_width(self, entry, label):
-        # Adapt the length of the entry while typing
-        new_entry_width = len(label) + 2
-        entry.configure(width=new_entry_width)
-        self.update_scroll_region()
+        # Adapt the length of the entry while typing, only when needed
+        new_entry_width = self.text_width(label)
+        if int(entry.cget("width")) != new_entry_width:
+            entry.configure(width=new_entry_width)
+            self.update_scroll_region()
 
     def update_scroll_region(self):
         # Update canvas scrolling region
@@ -510,13 +638,146 @@ class Two_Rows_View(tk.LabelFrame):
         self.set_canvas_height(None)
 
 
+class Bar_Chart_Renderer:
+    """
+    Renders the bar chart into RGBA images in a background thread,
+    and caches them by (data version, width bucket, height bucket)
+
+    The figure is only used by the worker thread and kept between the renders : the bars are updated in place
+    (set_height) and the layout is only redone when the number of bars or the axis changes.
+    """
+    DPI = 100
+    SIZE_BUCKET = 50  # pixels
+    CACHE_SIZE = 32
+
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=self.__class__.__name__)
+        self.cache = OrderedDict()  # dict[(version, width_bucket, height_bucket)] = (width, height, rgba)
+        self.cache_lock = threading.Lock()
+
+        # used by the worker thread only (matplotlib is imported by the first render to keep the startup short)
+        self.figure = None
+        self.figure_canvas = None
+        self.ax = None
+        self.bars = []
+        self.item_labels = []
+        self.value_tags = None
+        self.y_max = None
+
+    def cache_key(self, version, width, height):
+        return version, width // self.SIZE_BUCKET, height // self.SIZE_BUCKET
+
+    def cached_image(self, version, width, height):
+        """ Returns (is_exact_size, image) with the nearest cached image of this data version, or (False, None) """
+        key = self.cache_key(version, width, height)
+        with self.cache_lock:
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                return True, self.cache[key]
+            same_version_keys = [cached_key for cached_key in self.cache if cached_key[0] == version]
+            if len(same_version_keys) == 0:
+                return False, None
+            nearest_key = min(same_version_keys,
+                              key=lambda cached_key: abs(cached_key[1] - key[1]) + abs(cached_key[2] - key[2]))
+            return False, self.cache[nearest_key]
+
+    def render(self, version, width, height, chart_data):
+        """ Returns a Future of the (width, height, rgba) image, 'chart_data' must not be modified afterwards """
+        return self.executor.submit(self._render, version, width, height, chart_data)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _create_figure(self):
+        # The figure is drawn by an Agg canvas without pyplot (so no GUI backend is started outside the main thread)
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+        self.figure = Figure(dpi=self.DPI)
+        self.figure_canvas = FigureCanvasAgg(self.figure)
+        self.ax = self.figure.add_subplot()
+
+    def _render(self, version, width, height, chart_data):
+        item_labels, graph_values, value_tags, y_max, value_name = chart_data
+        if self.figure is None:
+            self._create_figure()
+        self.figure.set_size_inches(width / self.DPI, height / self.DPI)
+
+        if len(self.bars) != len(graph_values) or value_tags != self.value_tags or y_max != self.y_max:
+            # The number of bars or the axis changed : layout the whole chart again
+            self.design_chart(item_labels, graph_values, value_tags, y_max, value_name)
+        else:
+            # Only update the bars and their labels in place
+            self.set_bar_heights(graph_values)
+            if list(item_labels) != self.item_labels:
+                self.set_item_labels(item_labels)
+
+        self.figure_canvas.draw()
+        image = (*self.figure_canvas.get_width_height(), bytes(self.figure_canvas.buffer_rgba()))
+
+        with self.cache_lock:
+            self.cache[self.cache_key(version, width, height)] = image
+            while len(self.cache) > self.CACHE_SIZE:
+                self.cache.popitem(last=False)  # least recently used
+        return image
+
+    def design_chart(self, item_labels, graph_values, value_tags, y_max, value_name):
+        self.ax.clear()
+        self.value_tags = value_tags
+        self.y_max = y_max
+
+        # Create a new bar graph
+        x_values = range(len(item_labels))
+        self.bars = list(self.ax.bar(x_values, graph_values, color='skyblue'))
+
+        # Label the axes, with fixed limits so the bars can change without a new layout
+        self.ax.set_ylabel(value_name)
+        if len(value_tags) > 0:
+            self.ax.set_yticks(list(value_tags.values()))
+            self.ax.set_yticklabels(list(value_tags.keys()))
+        self.ax.set_ylim(0, y_max)
+        self.ax.set_xlim(-0.5, len(item_labels) - 0.5)
+
+        # Set the positions of the ticks and their labels
+        self.ax.set_xticks(list(x_values))
+        self.set_item_labels(item_labels)
+
+    def set_item_labels(self, item_labels):
+        self.item_labels = list(item_labels)
+        # Wrap task names to fit the bar width
+        wrapped_item_labels = [textwrap.fill(item_label, width=16) for item_label in item_labels]
+        self.ax.set_xticklabels(wrapped_item_labels, rotation=45)
+
+        # Auto Adjust the position of the graph within the figure according to the length of item labels
+        max_len = max([len(n) for n in item_labels])
+        enlarge_bottom = 0.1 if max_len <= 4 \
+            else 0.2 if max_len <= 8 \
+            else 0.25 if max_len <= 16 \
+            else 0.3 if max_len <= 32 \
+            else 0.4
+        self.figure.subplots_adjust(bottom=enlarge_bottom, top=0.95)
+
+    def set_bar_heights(self, graph_values):
+        for bar, graph_value in zip(self.bars, graph_values):
+            bar.set_height(graph_value)
+
+
 class Bar_Chart_View(tk.LabelFrame):
+    RENDER_POLL_INTERVAL = 50   # ms between the checks of the render in progress
 
     def __init__(self, root_window, viewmodel, **kwargs):
         super().__init__(root_window, text=self.__class__.__name__, labelanchor=tk.NW, **kwargs)
 
         # delegate all interactions to the view_model
         self.view_model: Bar_Chart_ViewModel_API = viewmodel
+        # the view model refreshes the view in the main loop of its root window (not from the other threads)
+        self.view_model.set_call_later(
+            lambda delay, function, root=self.winfo_toplevel(): root.after(int(delay * 1000), function))
+
+        # Select how the tasks are displayed (one bar per task or aggregated)
+        self.display_mode_var = BoundTk_StringVar("display_mode_var", self.view_model.display_mode, self)
+        display_mode_menu = tk.OptionMenu(self, self.display_mode_var, *self.view_model.display_modes)
+        display_mode_menu.pack(side=tk.TOP, anchor=tk.NE)
 
         # Create a label in case of no task to display
         self.image_label = tk.Label(
@@ -526,19 +787,37 @@ class Bar_Chart_View(tk.LabelFrame):
             image=""
         )
 
+        # The chart is rendered by a background thread, the label displays the nearest rendered image meanwhile
+        self.renderer = Bar_Chart_Renderer()
+        self.data_version = 0  # incremented on each data modification
+        self.chart_data = None
+        self.render_request_id = None   # a single render of the latest data for several modifications in a row
+        self.pending_render = None  # ((version, width, height), future) of the single render in progress
+        self.render_poll_id = None
+
         self.bound_tuples = Bound_List(
             name="bound_tuples",
             observable_list=self.view_model.label_value_tuple_list,
             on_size_modified=self.update_main_frame,
             on_item_modified=self.update_main_frame
         )
-        atexit.register(self.on_closing)
+        # Unbinds when the widget is destroyed instead of at exit so closed views can be garbage collected
+        self.bind("<Destroy>", self.on_destroy, add="+")
 
         self.configure_event_id = None
         self.run()
 
+    def on_destroy(self, event):
+        if event.widget is self:
+            self.on_closing()
+
     def on_closing(self):
+        self.display_mode_var.unbind_tk_var()
         self.bound_tuples.unbind_list()
+        for after_id in (self.render_request_id, self.render_poll_id):
+            if after_id is not None:
+                self.after_cancel(after_id)
+        self.renderer.shutdown()
 
     def run(self):
         self.update_main_frame()  # engaging a first loading of the data
@@ -550,43 +829,93 @@ class Bar_Chart_View(tk.LabelFrame):
             self.after_cancel(self.configure_event_id)
         self.configure_event_id = self.after(50, self.resize_image)
 
-    def resize_image(self):
+    def image_size(self):
         x_borders = 8  # 2 * 4
         y_borders = 23  # 2 * 4 + 15 (text of label frame)
-        if len(self.bound_tuples) > 0:
-            self.set_image_label(super().winfo_width() - x_borders, super().winfo_height() - y_borders)
+        if super().winfo_width() <= 1:  # not displayed yet
+            return 600, 400
+        return super().winfo_width() - x_borders, super().winfo_height() - y_borders
+
+    def resize_image(self):
+        if len(self.bound_tuples) > 0 and self.render_request_id is None:  # else rendered at the requested size
+            self.set_image_label(*self.image_size())
 
     def update_main_frame(self, index=None):
         self.image_label.pack_forget()  # Allow to the image to be resized properly
         if len(self.bound_tuples) == 0:
             self.set_text_label()
         else:
-            self.set_image_label(600, 400)
+            # Each modified item calls it : the chart is only rendered once idle, with the latest data
+            self.data_version += 1
+            if self.render_request_id is None:
+                self.render_request_id = self.after_idle(self.render_latest_data)
         self.image_label.pack(fill=tk.BOTH, expand=True)
 
+    def render_latest_data(self):
+        self.render_request_id = None
+        if len(self.bound_tuples) > 0:
+            self.chart_data = self.get_chart_data()
+            self.set_image_label(*self.image_size())
+
     def set_text_label(self):
         self.image_label.config(text=self.view_model.no_item_message, image="", padx=20)
         self.image_label.image = None
 
     def set_image_label(self, width, height):
-        # Update the content of the new graph
-        image_data = self.design_chart(width, height)
-
-        # Create a PhotoImage object from the base64-encoded image
-        img = Image.open(io.BytesIO(image_data))
-        photo = ImageTk.PhotoImage(img)
+        is_exact_size, image = self.renderer.cached_image(self.data_version, width, height)
+        if image is not None:
+            # Display the nearest rendered image immediately
+            self.display_image(image)
+        if is_exact_size:
+            return
+        if self.pending_render is not None and not self.pending_render[1].cancel():
+            return  # already rendering : the latest data is rendered once it is done (see check_pending_render)
+        self.pending_render = ((self.data_version, width, height),
+                               self.renderer.render(self.data_version, width, height, self.chart_data))
+        if self.render_poll_id is None:
+            self.render_poll_id = self.after(self.RENDER_POLL_INTERVAL, self.check_pending_render)
+
+    def check_pending_render(self):
+        self.render_poll_id = None
+        if self.pending_render is None:
+            return
+        render_key, future = self.pending_render
+        if not future.done():
+            self.render_poll_id = self.after(self.RENDER_POLL_INTERVAL, self.check_pending_render)
+            return
+        self.pending_render = None
+        if future.cancelled() or future.exception() is not None:
+            return  # an error occurred in the background thread
+        if render_key == (self.data_version, *self.image_size()):
+            self.display_image(future.result())
+        elif self.render_request_id is None:
+            self.render_latest_data()   # modified or resized during the render (the outdated image is ignored)
+
+    def display_image(self, image):
+        from PIL import Image, ImageTk  # imported with the first chart only
+
+        width, height, rgba = image
+        photo = ImageTk.PhotoImage(Image.frombuffer("RGBA", (width, height), rgba, "raw", "RGBA", 0, 1))
 
         # This line keeps a reference to the image to prevent it from being garbage collected
         self.image_label.config(text="", image=photo, padx=0)
         self.image_label.image = photo
 
-    def design_chart(self, width, height):
-        DPI = 100
-        # Create a new figure and axis
-        figure, ax = plt.subplots(figsize=(width / DPI, height / DPI), dpi=DPI)
-
+    def get_chart_data(self):
+        """ Immutable snapshot of the data to render in the background thread """
         item_labels, item_values = zip(*[(item[0], item[1]) for item in self.bound_tuples])
+        value_tags = self.get_value_tags()
+        if len(value_tags) > 0:
+            # convert the item_values into values for graph (reversed)
+            graph_values = tuple(value_tags[str(item_value)] for item_value in item_values)
+            y_max = max(value_tags.values()) + 0.5
+        else:
+            # no options : numerical values (like the counts of the aggregated modes)
+            graph_values = tuple(float(item_value) for item_value in item_values)
+            y_max = max(graph_values, default=0) * 1.1 or 1
+        return item_labels, graph_values, dict(value_tags), y_max, self.view_model.value_name
 
+    def get_value_tags(self):
         # The highest bar will be the highest priority so the lowest value (the bigger is priority 1)
         # if self.value_options = [1,2,3,4]
         # value_tags = {'1'=4,'2'=3,'3'=2,'4'=1}
@@ -598,53 +927,12 @@ class Bar_Chart_View(tk.LabelFrame):
             else:
                 for i, option in enumerate(self.view_model.value_options):
                     value_tags[str(option)] = int(str(option))
-
-        # convert the item_values into values for graph (reversed)
-        graph_values = [value_tags[str(item_value)] for item_value in item_values]
-
-        # Create a new bar graph using pyplot
-        x_values = range(len(item_labels))
-        ax.bar(x_values, graph_values, color='skyblue')
-
-        # Label the axes
-        ax.set_ylabel(self.view_model.value_name)
-        ax.set_yticks(list(value_tags.values()))
-        ax.set_yticklabels(list(value_tags.keys()))
-
-        # Convert the range object to a list of integers
-        tick_positions = list(range(len(item_labels)))
-        # Wrap task names to fit the bar width
-        wrapped_item_labels = [textwrap.fill(item_label, width=16) for item_label in item_labels]
-        # Set the positions of the ticks and their labels
-        ax.set_xticks(tick_positions)
-        ax.set_xticklabels(wrapped_item_labels, rotation=45)
-
-        # Auto Adjust the position of the graph within the figure according to the length of item labels
-        max_len = max([len(n) for n in item_labels])
-        enlarge_bottom = 0.1 if max_len <= 4 \
-            else 0.2 if max_len <= 8 \
-            else 0.25 if max_len <= 16 \
-            else 0.3 if max_len <= 32 \
-            else 0.4
-        ax.figure.subplots_adjust(bottom=enlarge_bottom, top=0.95)
-
-        # Create a BytesIO buffer to store the image in memory in binary
-        buffer = io.BytesIO()
-        # Save the plot in the BytesIO buffer instead of a file in binary
-        plt.savefig(buffer, format='png')
-        # Delete the figure and close the plot after saving it to the buffer
-        figure.clf()
-        plt.close()
-
-        # Retrieve the image data as a byte string
-        buffer.seek(0)
-        image_data = buffer.getvalue()
-        buffer.close()
-        return image_data
+        return value_tags
 
 
 if __name__ == "__main__":
 
+    import time
     import tkinter as tk
 
     from Observer_patterns.Observables import ObservableList, ObservableProperty
@@ -656,6 +944,7 @@ if __name__ == "__main__":
 
     def param_button_list_viewmodel(viewmodel: Button_List_ViewModel_API):
         # The view should be limited to its API not to use GUI technology methods
+        viewmodel.set_call_later = lambda call_later: None   # nothing to refresh
 
         # common
         viewmodel.label_name = "label_name"
@@ -691,6 +980,7 @@ if __name__ == "__main__":
 
     def param_two_columns_viewmodel(viewmodel: Two_Columns_ViewModel_API):
         # The view should be limited to its API not to use GUI technology methods
+        viewmodel.set_call_later = lambda call_later: None   # nothing to refresh
 
         # common
         viewmodel.label_name = "label_name"
@@ -716,6 +1006,7 @@ if __name__ == "__main__":
 
     def param_two_rows_viewmodel(viewmodel: Two_Rows_ViewModel_API):
         # The view should be limited to its API not to use GUI technology methods
+        viewmodel.set_call_later = lambda call_later: None   # nothing to refresh
 
         # Main Frame
         viewmodel.label_list = ObservableList(["Label1", "Label2", "Label3"])
@@ -732,12 +1023,15 @@ if __name__ == "__main__":
 
     def param_bar_chart_viewmodel(viewmodel: Bar_Chart_ViewModel_API):
         # The view should be limited to its API not to use GUI technology methods
+        viewmodel.set_call_later = lambda call_later: None   # nothing to refresh
 
         # Main Frame
         viewmodel.value_name = "value_name"
         viewmodel.value_options = ["1", "2", "3", "4", "5"]
         viewmodel.reversed_options = False
         viewmodel.no_item_message = "No item"
+        viewmodel.display_modes = ["Items"]
+        viewmodel.display_mode = ObservableProperty("Items")
         viewmodel.label_value_tuple_list = ObservableList([("Label1", "2"), ("Label2", "1"), ("Label3", "3")])
 
 
@@ -754,6 +1048,7 @@ if __name__ == "__main__":
             print("2. Two_Columns_View")
             print("3. Two_Rows_View")
             print("4. Bar_Chart_View")
+            print("5. Button_List_View refresh time vs row count")
             print("0. Quit")
             choice = input("Your choice : ")
 
@@ -801,6 +1096,39 @@ if __name__ == "__main__":
 
                 window.mainloop()
 
+            elif choice == "5":
+                window = open_window()
+
+                button_list_viewmodel = Button_List_ViewModel_API()
+                param_button_list_viewmodel(button_list_viewmodel)
+
+                button_list_view = Button_List_View(window, button_list_viewmodel)
+                button_list_view.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+                window.update()
+
+                for row_count in (10, 100, 1_000, 5_000, 10_000, 50_000):
+                    labels = [f"Task {i}, value_name {i % 5 + 1}" for i in range(row_count)]
+                    button_list_viewmodel.label_value_list.update([])
+                    window.update()
+
+                    # Refresh on a modified size of the list
+                    start = time.perf_counter()
+                    button_list_viewmodel.label_value_list.update(labels)
+                    window.update_idletasks()
+                    size_refresh = time.perf_counter() - start
+
+                    # Refresh on a modified item of the list
+                    labels[0] = "Modified task, value_name 1"
+                    start = time.perf_counter()
+                    button_list_viewmodel.label_value_list.update(labels)
+                    window.update_idletasks()
+                    item_refresh = time.perf_counter() - start
+
+                    print(f"{row_count:>6} rows : size refresh {size_refresh * 1000:8.1f} ms, "
+                          f"item refresh {item_refresh * 1000:8.1f} ms")
+
+                window.destroy()
+
             elif choice == "0":
                 break
 